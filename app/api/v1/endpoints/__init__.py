@@ -6,4 +6,5 @@ from .orders import router as order_router
 from .tracking import router as tracking_router
 from .shipping import router as shipping_router
 from .cart import router as cart_router
-from .gateways.stripe import router as gateway_stripe_router
\ No newline at end of file
+from .gateways.stripe import router as gateway_stripe_router
+from .metrics import router as metrics_router
@@ -10,7 +10,6 @@ from fastapi import (
     Form,
     HTTPException
 )
-from fastapi_cache.decorator import cache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.future import select
@@ -20,7 +19,13 @@ from app.db import get_async_session
 from app.models.account import AccountModel
 from app.models.store import StoreModel
 from app.schemas.account import AccountInput, AccountOutput
-from app.core import oauth2_scheme
+from app.core import (
+    oauth2_scheme,
+    decode_access_token,
+    revocation_store,
+    token_key,
+    CLAIMS_VERSION
+)
 
 
 router = APIRouter(
@@ -76,14 +81,19 @@ async def check_user_has_store(
     session: AsyncSession = Depends(get_async_session)
 ):
     try:
-        payload = jwt.decode(
-            token, 
-            config("SECRET_KEY"), 
-            algorithms=[
-                config("ALGORITHM")
-            ]
-        )
+        payload = decode_access_token(token)
         email = payload.get("sub")
+
+        if await revocation_store.is_revoked(token_key(token, payload)):
+            raise HTTPException(status_code=401, detail="Token inválido")
+
+        # Tokens novos trazem as lojas nos claims: sem consulta ao banco
+        if payload.get("cv") == CLAIMS_VERSION and "store_ids" in payload:
+            store_ids = payload["store_ids"]
+            return {
+                "has_store": bool(store_ids),
+                "store_id": store_ids[0] if store_ids else None
+            }
         
         # Query com carregamento do relacionamento store
         result = await session.execute(
@@ -101,7 +111,7 @@ async def check_user_has_store(
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
-    
+
 
 @router.get("/public/store")
 async def check_public_store(
@@ -1,4 +1,5 @@
 import json
+import math
 from datetime import datetime, timedelta
 from typing import Union, Any
 from fastapi import (
@@ -6,10 +7,11 @@ from fastapi import (
     FastAPI, 
     HTTPException, 
     status, 
-    APIRouter
+    APIRouter,
+    Request
 )
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
+from jose import JWTError, ExpiredSignatureError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 from typing_extensions import Annotated
@@ -20,10 +22,13 @@ from app.models import AccountModel
 from app.db import get_async_session
 from app.core.security import (
     create_access_token,
-    access_token_expires as token_expires,
-    password_reset_tokens,
-    blacklisted_tokens
+    decode_access_token,
+    issue_access_token,
+    ACCESS_TOKEN_LIFETIME,
+    access_token_expires as token_expires
 )
+from app.core.revocation import reset_tokens, revocation_store, token_key
+from app.core.throttle import login_throttle
 
 
 router = APIRouter(
@@ -38,9 +43,20 @@ router = APIRouter(
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: Any = Depends(get_async_session)
 ):
+    # Limite por IP/e-mail antes de qualquer consulta ou bcrypt
+    client_ip = request.client.host if request.client else None
+    retry_after = await login_throttle.check(client_ip, form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas de login, tente novamente mais tarde",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     # Autenticação assíncrona com await
     user = await AccountModel.authenticate_user(
         email=form_data.username,
@@ -49,20 +65,13 @@ async def login_for_access_token(
     )
     
     if not user:
+        await login_throttle.record_failure(client_ip, form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="E-mail ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
-    # Configurar tempo de expiração do token
-    access_token_expires = timedelta(minutes=30)
-    
-    # Criar payload do token com dados serializáveis
-    access_token = create_access_token(
-        data={"sub": user["email"]},  # Usar email ou ID como identificador
-        expires_delta=access_token_expires
-    )
+    await login_throttle.record_success(client_ip, form_data.username)
 
     # Obter dados do usuário de forma assíncrona
     user_data = await AccountModel.get_user_email(
@@ -71,6 +80,13 @@ async def login_for_access_token(
     )
     print(f'USER DATA::: {user_data}')
 
+    # Token com as lojas da conta nos claims
+    access_token = issue_access_token(
+        email=user_data["email"],
+        store_ids=await AccountModel.get_store_ids(user_data["id"], session),
+        expires_delta=ACCESS_TOKEN_LIFETIME
+    )
+
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -83,6 +99,29 @@ async def login_for_access_token(
     }
 
 
+@router.post("/token/refresh", response_model=Token)
+async def refresh_access_token(
+    current_user: dict = Depends(AccountModel.get_current_user),
+    session: Any = Depends(get_async_session)
+):
+    """Novo token com os claims (lojas) atualizados e validade renovada"""
+    access_token = issue_access_token(
+        email=current_user["email"],
+        store_ids=await AccountModel.get_store_ids(current_user["id"], session),
+        expires_delta=ACCESS_TOKEN_LIFETIME
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": [
+            {
+                "email": current_user["email"],
+                "id": str(current_user["id"])
+            }
+        ]
+    }
+
+
 @router.get("/users/me/")
 async def read_users_me(current_user: Annotated[AuthAccountToken, Depends(AccountModel.get_current_user)]):
     return current_user
@@ -95,8 +134,16 @@ async def read_own_items(current_user: Annotated[AccountModel, Depends(AccountMo
 
 @router.post("/logout")
 async def revoke_token(token: str):
-    # Add the token to the in-memory blacklist
-    blacklisted_tokens.append(token)
+    try:
+        payload = decode_access_token(token)
+    except ExpiredSignatureError:
+        # Já vencido: não há o que revogar
+        return {"message": "Token revoked"}
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    # Fica revogado só até o `exp`; depois o próprio token deixa de valer
+    await revocation_store.revoke(token_key(token, payload), payload["exp"])
     return {"message": "Token revoked"}
 
 
@@ -121,9 +168,9 @@ async def forgot_password(email: str):
             data={"sub": user[0].get("mail")},
             expires_delta=access_token_expires
         )
-        password_reset_tokens[email] = token
+        reset_tokens.set(email, token)
         # Aqui, você normalmente enviaria um e-mail com o token para o usuário
-        return password_reset_tokens[email]
+        return reset_tokens.get(email)
     else:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+from app.core.cache import route_cache
+from app.core.http import http_clients
+from app.core.hashing import password_hasher
+from app.core.revocation import revocation_store
+from app.core.snapshot import cache_snapshot
+from app.core.throttle import login_throttle
+from app.services import (
+    cep_resolver,
+    correios_quotes,
+    delivery_zones,
+    provider_timings,
+    quote_demand,
+    shipping_rules
+)
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
+@router.get("/cache")
+async def cache_metrics():
+    return {
+        "cep": cep_resolver.stats(),
+        "correios": correios_quotes.stats(),
+        "routes": route_cache.stats(),
+        "routes_l1": route_cache.backend.l1.stats(),
+        "snapshot": cache_snapshot.stats()
+    }
+
+
+@router.get("/shipping")
+async def shipping_metrics():
+    return {
+        "providers": provider_timings.stats(),
+        "rules": shipping_rules.stats(),
+        "delivery_zones": delivery_zones.stats(),
+        "prefetch": quote_demand.stats()
+    }
+
+
+@router.get("/limits")
+async def limit_metrics():
+    return {
+        name: limiter.stats()
+        for name, limiter in http_clients.limiters.items()
+    }
+
+
+@router.get("/breakers")
+async def breaker_metrics():
+    return {
+        name: breaker.stats()
+        for name, breaker in http_clients.breakers.items()
+    }
+
+
+@router.get("/auth")
+async def auth_metrics():
+    return {
+        "password_hash": password_hasher.stats(),
+        "revocation": revocation_store.stats(),
+        "login_throttle": login_throttle.stats()
+    }
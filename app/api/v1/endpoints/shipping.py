@@ -1,17 +1,26 @@
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import route_cache, make_key
 from app.db import get_async_session
 from app.schemas import (
     ShippingCalculateRequest, 
     ShippingOptionResponse,
     LocalDeliveryRequest,
-    LocalDeliveryResponse
-    
+    LocalDeliveryResponse,
+    ShippingBatchRequest,
+    ShippingBatchResponse,
+    StoreDeliveryOption,
+    CEP_PATTERN
 )
 from app.models import AccountModel, StoreModel
-from app.services import ShippingCalculator, LocalDeliveryCalculator
+from app.utils import ProviderUnavailableError, RateLimitedError, current_tenant
+from app.services import (
+    ShippingCalculator,
+    LocalDeliveryCalculator,
+    store_locator,
+    delivery_zones
+)
 
 
 router = APIRouter(
@@ -19,21 +28,75 @@ router = APIRouter(
 )
 
 @router.post("/shipping/calculate", response_model=List[ShippingOptionResponse])
-@cache(expire=60 * 30)  # Cache de 30 minutos
 async def calculate_shipping(
     request: ShippingCalculateRequest,
+    response: Response,
     calculator: ShippingCalculator = Depends(),
     session: AsyncSession = Depends(get_async_session)
 ):
+    async def compute():
+        options = await calculator.calculate(request, session)
+        # Respostas parciais, degradadas ou com cotação vencida não vão para o cache
+        cacheable = not calculator.partial and not calculator.degraded and not any(
+            option.stale for option in options
+        )
+        return [option.model_dump() for option in options], cacheable
+
     try:
-        return await calculator.calculate(request, session)
+        options, hit = await route_cache.get_or_compute(
+            namespace="shipping-calculate",
+            key=make_key("shipping-calculate", request),
+            compute=compute,
+            expire=60 * 30  # Cache de 30 minutos
+        )
+    except RateLimitedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao calcular fretes: {str(e)}"
         )
+
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    if calculator.timings:
+        response.headers["Server-Timing"] = calculator.server_timing()
+    if calculator.partial:
+        response.headers["X-Shipping-Partial"] = ",".join(calculator.partial)
+    if calculator.degraded:
+        response.headers["X-Shipping-Degraded"] = ",".join(calculator.degraded)
+    return options
     
     
+@router.post("/shipping/calculate/batch", response_model=ShippingBatchResponse)
+async def calculate_shipping_batch(
+    batch: ShippingBatchRequest,
+    response: Response,
+    calculator: ShippingCalculator = Depends(),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # Todas as requisições do lote são da mesma loja (validado no schema)
+    requests = [
+        request.model_copy(update={"store_id": batch.store_id})
+        if batch.store_id is not None else request
+        for request in batch.requests
+    ]
+    try:
+        results = await calculator.calculate_batch(requests, session)
+    except RateLimitedError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao calcular fretes: {str(e)}"
+        )
+
+    response.headers["Server-Timing"] = calculator.server_timing()
+    return ShippingBatchResponse(
+        results=results,
+        partial=calculator.partial
+    )
+
+
 @router.post("/shipping/local", response_model=LocalDeliveryResponse)
 async def calculate_local_delivery(
     request: LocalDeliveryRequest,
@@ -45,8 +108,31 @@ async def calculate_local_delivery(
     )
     if not store:
         raise HTTPException(404, "Loja não encontrada")
-    
+    current_tenant.set(str(store.id))
+
+    # Zona pré-calculada; sem ela (ou vencida), cálculo ao vivo
+    zone = await delivery_zones.lookup(
+        store,
+        request.destination_cep,
+        session
+    )
+    if zone is not None:
+        return zone
+
     return await LocalDeliveryCalculator().calculate(
         store, 
         request.destination_cep
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/shipping/local/stores", response_model=List[StoreDeliveryOption])
+async def find_local_delivery_stores(
+    destination_cep: str = Query(..., pattern=CEP_PATTERN)
+):
+    """Lista as lojas que fazem entrega local no CEP, com taxa e prazo"""
+    try:
+        return await store_locator.find(destination_cep)
+    except ProviderUnavailableError:
+        raise
+    except ValueError as e:
+        raise HTTPException(404, str(e))
@@ -7,13 +7,14 @@ from fastapi import (
     UploadFile, 
     File, 
     Form,
-    HTTPException
+    HTTPException,
+    Response
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_async_session
 from app.models import StoreModel, AccountModel
 from app.schemas import StoreOutput, StoreInput
-from app.core import oauth2_scheme
+from app.core import oauth2_scheme, issue_access_token, ACCESS_TOKEN_LIFETIME
 
 
 router = APIRouter(
@@ -28,6 +29,7 @@ router = APIRouter(
 
 @router.post("/", response_model=StoreOutput)
 async def new_store(
+    response: Response,
     store: str = Form(...),
     account: AccountModel = Depends(AccountModel.get_current_user),  # ← Remove a dependência duplicada do token
     session: AsyncSession = Depends(get_async_session),
@@ -41,6 +43,13 @@ async def new_store(
             store=store_obj, 
             session=session
         )
+
+        # Token novo com a loja nos claims; o front troca o token salvo
+        response.headers["X-Access-Token"] = issue_access_token(
+            email=account["email"],
+            store_ids=await AccountModel.get_store_ids(account["id"], session),
+            expires_delta=ACCESS_TOKEN_LIFETIME
+        )
         return StoreOutput.model_validate(store_item)
     except Exception as e:
         await session.rollback()
@@ -8,7 +8,8 @@ from .endpoints import (
     tracking_router,
     shipping_router,
     cart_router,
-    gateway_stripe_router
+    gateway_stripe_router,
+    metrics_router
 )
 
 
@@ -21,4 +22,5 @@ router.include_router(order_router)
 router.include_router(tracking_router)
 router.include_router(shipping_router)
 router.include_router(cart_router)
-router.include_router(gateway_stripe_router)
\ No newline at end of file
+router.include_router(gateway_stripe_router)
+router.include_router(metrics_router)
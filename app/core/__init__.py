@@ -1,10 +1,21 @@
 from .config import app, Base, Settings
+from .http import HTTPClientRegistry, http_clients
+from .hashing import PasswordHasher, password_hasher
+from .revocation import (
+    RevocationStore,
+    revocation_store,
+    reset_tokens,
+    token_key
+)
+from .throttle import LoginThrottle, login_throttle
 from .security import (
     access_token_expires,
     create_access_token,
+    decode_access_token,
+    issue_access_token,
+    CLAIMS_VERSION,
+    ACCESS_TOKEN_LIFETIME,
     URL,
-    blacklisted_tokens,
-    password_reset_tokens,
     oauth2_scheme,
     verify_password,
     get_password_hash,
@@ -0,0 +1,171 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from decouple import config
+from pydantic import BaseModel
+from fastapi_cache.types import Backend
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from app.utils import TTLCache, SingleFlight
+from .snapshot import cache_snapshot
+
+
+ROUTE_CACHE_L1_SIZE = config("ROUTE_CACHE_L1_SIZE", default=5000, cast=int)
+ROUTE_CACHE_L1_TTL = config("ROUTE_CACHE_L1_TTL", default=60 * 5, cast=int)
+# "" desliga o L2; "local" usa um backend em memória no lugar do compartilhado;
+# "redis://..." usa Redis (requer o pacote redis)
+ROUTE_CACHE_L2 = config("ROUTE_CACHE_L2", default="")
+ROUTE_CACHE_PREFIX = "lh-cache"
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return _normalize(value.model_dump(mode="json"))
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float):
+        return round(value, 3)
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    # Dependências (sessão, calculadoras...) não fazem parte da chave
+    return None
+
+
+def make_key(namespace: str, *payload: Any) -> str:
+    """Chave determinística: hash do conteúdo normalizado da requisição"""
+    normalized = json.dumps(
+        [_normalize(item) for item in payload],
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    digest = hashlib.sha256(normalized.encode()).hexdigest()
+    return f"{ROUTE_CACHE_PREFIX}:{namespace}:{digest}"
+
+
+def _build_l2(url: str) -> Optional[Backend]:
+    if not url:
+        return None
+    if url == "local":
+        return InMemoryBackend()
+
+    try:
+        from redis import asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+    except ImportError:
+        print("WARNING: pacote redis não instalado, cache L2 desativado")
+        return None
+    return RedisBackend(aioredis.from_url(url))
+
+
+class TieredBackend(Backend):
+    """
+        Backend do fastapi-cache em dois níveis: L1 LRU limitado no
+        processo e L2 opcional compartilhado entre workers.
+    """
+
+    def __init__(
+        self,
+        l1_size: int = ROUTE_CACHE_L1_SIZE,
+        l1_ttl: int = ROUTE_CACHE_L1_TTL,
+        l2: Optional[Backend] = None
+    ):
+        self.l1 = TTLCache(maxsize=l1_size, ttl=l1_ttl)
+        self.l1_ttl = l1_ttl
+        self.l2 = l2
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        ttl, value = self.l1.get_with_ttl(key)
+        if value is not None or self.l2 is None:
+            return ttl, value
+
+        ttl, value = await self.l2.get_with_ttl(key)
+        if value is not None and ttl:
+            self.l1.set(key, value, ttl=min(ttl, self.l1_ttl))
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        ttl = expire or self.l1_ttl
+        if self.l2 is None:
+            self.l1.set(key, value, ttl=ttl)
+            return
+
+        # Com L2, o L1 guarda por pouco tempo para não servir dado velho
+        self.l1.set(key, value, ttl=min(ttl, self.l1_ttl))
+        await self.l2.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if key:
+            removed = int(self.l1.pop(key) is not None)
+        elif namespace:
+            keys = [item for item in self.l1.keys() if f":{namespace}:" in item]
+            for item in keys:
+                self.l1.pop(item)
+            removed = len(keys)
+        else:
+            removed = len(self.l1)
+            self.l1.clear()
+
+        if self.l2 is not None:
+            removed += await self.l2.clear(namespace, key)
+        return removed
+
+
+class RouteCache:
+    """
+        Cache de respostas de rotas sobre o TieredBackend, com proteção
+        contra stampede (uma única computação por chave) e estatísticas
+        de acerto por rota.
+    """
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self._flight = SingleFlight()
+        self._stats: dict = {}
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        key: str,
+        compute: Callable[[], Awaitable[Tuple[Any, bool]]],
+        expire: int
+    ) -> Tuple[Any, bool]:
+        """
+            Retorna (valor, veio_do_cache). `compute` devolve (valor,
+            pode_cachear) e só roda uma vez por chave entre requisições
+            simultâneas.
+        """
+
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        cached = await self.backend.get(key)
+        if cached is not None:
+            stats["hits"] += 1
+            return json.loads(cached), True
+
+        stats["misses"] += 1
+        value, _ = await self._flight.do(key, self._compute, key, compute, expire)
+        return value, False
+
+    async def _compute(self, key: str, compute: Callable, expire: int) -> Tuple[Any, bool]:
+        value, cacheable = await compute()
+        if cacheable:
+            await self.backend.set(key, json.dumps(value).encode(), expire)
+        return value, cacheable
+
+    def stats(self) -> dict:
+        result = {}
+        for namespace, stats in self._stats.items():
+            total = stats["hits"] + stats["misses"]
+            result[namespace] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / total, 4) if total else 0.0
+            }
+        result["coalesced"] = self._flight.stats()
+        return result
+
+
+route_cache = RouteCache(TieredBackend(l2=_build_l2(ROUTE_CACHE_L2)))
+cache_snapshot.register("routes", route_cache.backend.l1, dump=bytes, load=bytes)
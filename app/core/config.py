@@ -1,7 +1,5 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
 from sqlalchemy.ext.declarative import declarative_base
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -19,9 +17,3 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
-
-async def startup():
-    FastAPICache.init(InMemoryBackend(), prefix="lh-cache")
-
-
-app.add_event_handler("startup", startup)
\ No newline at end of file
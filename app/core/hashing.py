@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from decouple import config
+from passlib.context import CryptContext
+from app.utils import LatencyRecorder
+
+
+# "thread": bcrypt libera o GIL, então threads já tiram o custo do event loop.
+# "process": isola a CPU do worker (útil com muitos logins simultâneos)
+PASSWORD_HASH_EXECUTOR = config("PASSWORD_HASH_EXECUTOR", default="thread")
+PASSWORD_HASH_WORKERS = config(
+    "PASSWORD_HASH_WORKERS",
+    default=min(4, os.cpu_count() or 1),
+    cast=int
+)
+# Hashes em andamento + na fila do executor; o excedente espera no loop
+PASSWORD_HASH_MAX_CONCURRENCY = config(
+    "PASSWORD_HASH_MAX_CONCURRENCY",
+    default=PASSWORD_HASH_WORKERS * 2,
+    cast=int
+)
+
+_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return _context.verify(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return _context.hash(password)
+
+
+class PasswordHasher:
+    """
+        Executa o bcrypt fora do event loop, num executor limitado.
+        Um semáforo limita quantos hashes ficam pendentes no executor;
+        o tempo de espera (fila) e o de execução vão para as métricas.
+    """
+
+    def __init__(
+        self,
+        kind: str = PASSWORD_HASH_EXECUTOR,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_concurrency: int = PASSWORD_HASH_MAX_CONCURRENCY
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.timings = LatencyRecorder()
+        self._executor = None
+        self._semaphore = None
+        self._waiting = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, name: str, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        started = time.perf_counter()
+        self.timings.observe("queue", (started - queued_at) * 1000)
+        outcome = "ok"
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(),
+                func,
+                *args
+            )
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._semaphore.release()
+            self.timings.observe(name, (time.perf_counter() - started) * 1000, outcome)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", _verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "waiting": self._waiting,
+            **self.timings.stats()
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,134 @@
+import importlib.util
+import httpx
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+from decouple import config
+from app.utils import CircuitBreaker, FairRateLimiter
+from .config import Settings
+
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+PROVIDERS = {
+    "viacep": {
+        "base_url": "https://viacep.com.br",
+        "timeout": config("HTTP_TIMEOUT_VIACEP", default=3.0, cast=float),
+        "max_connections": config("HTTP_MAX_CONNECTIONS_VIACEP", default=20, cast=int),
+        "rate": config("RATE_LIMIT_VIACEP", default=20, cast=float),
+        "burst": config("RATE_LIMIT_BURST_VIACEP", default=20, cast=float),
+        "headers": {}
+    },
+    "nominatim": {
+        "base_url": "https://nominatim.openstreetmap.org",
+        "timeout": config("HTTP_TIMEOUT_NOMINATIM", default=5.0, cast=float),
+        # Política de uso do Nominatim: poucas conexões simultâneas
+        "max_connections": config("HTTP_MAX_CONNECTIONS_NOMINATIM", default=2, cast=int),
+        # Máximo de 1 requisição por segundo para toda a aplicação
+        "rate": config("RATE_LIMIT_NOMINATIM", default=1, cast=float),
+        "burst": config("RATE_LIMIT_BURST_NOMINATIM", default=1, cast=float),
+        "headers": {"User-Agent": "luhub-app"}
+    },
+    "correios": {
+        "base_url": "https://api.correios.com.br/preco/v1",
+        # Abaixo de SHIPPING_QUOTE_DEADLINE para a falha chegar ao breaker
+        "timeout": config("HTTP_TIMEOUT_CORREIOS", default=3.5, cast=float),
+        "max_connections": config("HTTP_MAX_CONNECTIONS_CORREIOS", default=20, cast=int),
+        # Cota do CORREIOS_API_KEY, compartilhada por todas as lojas
+        "rate": config("RATE_LIMIT_CORREIOS", default=10, cast=float),
+        "burst": config("RATE_LIMIT_BURST_CORREIOS", default=10, cast=float),
+        "headers": {}
+    },
+}
+RATE_LIMIT_MAX_WAIT = config("RATE_LIMIT_MAX_WAIT", default=5.0, cast=float)
+STRIPE_TIMEOUT = config("HTTP_TIMEOUT_STRIPE", default=30, cast=int)
+STRIPE_MAX_CONNECTIONS = config("HTTP_MAX_CONNECTIONS_STRIPE", default=10, cast=int)
+
+
+class HTTPClientRegistry:
+    """
+        Registro dos clientes HTTP de saída (ViaCEP, Nominatim, Correios
+        e Stripe). Os clientes são criados no startup da aplicação e
+        fechados no shutdown, reaproveitando conexões entre requisições.
+        Cada provedor tem também o seu circuit breaker e a sua cota
+        (token bucket com fila justa entre lojas).
+    """
+
+    def __init__(self, providers: dict = PROVIDERS):
+        self.providers = providers
+        self._clients: dict = {}
+        self._stripe_session = None
+        self.breakers = {
+            name: CircuitBreaker(name)
+            for name in providers
+        }
+        self.limiters = {
+            name: FairRateLimiter(
+                name,
+                rate=settings["rate"],
+                burst=settings["burst"],
+                max_wait=RATE_LIMIT_MAX_WAIT
+            )
+            for name, settings in providers.items()
+        }
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        return self.breakers[name]
+
+    def limiter(self, name: str) -> FairRateLimiter:
+        return self.limiters[name]
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        settings = self.providers[name]
+        headers = dict(settings["headers"])
+        if name == "correios":
+            headers["Authorization"] = f"Bearer {Settings().CORREIOS_API_KEY}"
+
+        return httpx.AsyncClient(
+            base_url=settings["base_url"],
+            headers=headers,
+            timeout=httpx.Timeout(settings["timeout"]),
+            limits=httpx.Limits(
+                max_connections=settings["max_connections"],
+                max_keepalive_connections=settings["max_connections"],
+                keepalive_expiry=30
+            ),
+            http2=HTTP2_AVAILABLE
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Retorna o cliente do provedor, criando-o se ainda não existir"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+    async def startup(self):
+        for name in self.providers:
+            self.get(name)
+
+        self._stripe_session = requests.Session()
+        self._stripe_session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=STRIPE_MAX_CONNECTIONS
+            )
+        )
+        stripe.default_http_client = stripe.RequestsClient(
+            timeout=STRIPE_TIMEOUT,
+            session=self._stripe_session
+        )
+
+    async def shutdown(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+        if self._stripe_session is not None:
+            self._stripe_session.close()
+            self._stripe_session = None
+
+
+http_clients = HTTPClientRegistry()
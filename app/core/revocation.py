@@ -0,0 +1,177 @@
+import hashlib
+import heapq
+import time
+from typing import Optional
+from decouple import config
+from app.utils import BloomFilter, TTLCache
+
+
+# "" ou "memory" guarda no processo; "redis://..." compartilha entre workers
+REVOCATION_BACKEND = config("REVOCATION_BACKEND", default="memory")
+REVOCATION_BLOOM_CAPACITY = config("REVOCATION_BLOOM_CAPACITY", default=100_000, cast=int)
+# Com backend compartilhado, de quanto em quanto tempo o filtro local
+# incorpora as revogações feitas nos outros workers (0 = sempre consulta)
+REVOCATION_SYNC_INTERVAL = config("REVOCATION_SYNC_INTERVAL", default=5, cast=float)
+RESET_TOKEN_CACHE_SIZE = config("RESET_TOKEN_CACHE_SIZE", default=10_000, cast=int)
+RESET_TOKEN_TTL = config("RESET_TOKEN_TTL", default=60 * 30, cast=int)
+
+
+def token_key(token: str, claims: Optional[dict] = None) -> str:
+    """Chave de revogação: `jti` do token ou, nos tokens antigos, o hash dele"""
+    jti = (claims or {}).get("jti")
+    if jti:
+        return str(jti)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class MemoryRevocationBackend:
+    """Revogações no processo; cada item some quando o token vence"""
+
+    shared = False
+
+    def __init__(self):
+        self._expires: dict = {}
+        self._heap: list = []
+
+    def _purge(self):
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires_at:
+                del self._expires[key]
+
+    async def add(self, key: str, expires_at: float):
+        self._purge()
+        self._expires[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+    async def contains(self, key: str) -> bool:
+        self._purge()
+        return key in self._expires
+
+    async def keys(self) -> list:
+        self._purge()
+        return list(self._expires)
+
+    async def size(self) -> int:
+        self._purge()
+        return len(self._expires)
+
+
+class RedisRevocationBackend:
+    """Revogações no Redis com EXPIRE no `exp` do token (requer o pacote redis)"""
+
+    shared = True
+    prefix = "lh-revoked:"
+
+    def __init__(self, url: str):
+        from redis import asyncio as aioredis
+        self.redis = aioredis.from_url(url)
+
+    async def add(self, key: str, expires_at: float):
+        ttl = max(1, int(expires_at - time.time()) + 1)
+        await self.redis.set(f"{self.prefix}{key}", 1, ex=ttl)
+
+    async def contains(self, key: str) -> bool:
+        return bool(await self.redis.exists(f"{self.prefix}{key}"))
+
+    async def keys(self) -> list:
+        return [
+            key.decode()[len(self.prefix):]
+            async for key in self.redis.scan_iter(match=f"{self.prefix}*", count=1000)
+        ]
+
+
+def _build_backend(url: str):
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        try:
+            return RedisRevocationBackend(url)
+        except ImportError:
+            print("WARNING: pacote redis não instalado, revogações ficam em memória")
+    return MemoryRevocationBackend()
+
+
+class RevocationStore:
+    """
+        Tokens revogados (logout), com remoção automática no `exp`.
+
+        Um filtro de Bloom local responde "não revogado" sem tocar no
+        backend, que é o caso de quase toda requisição; só um positivo
+        (revogado ou falso positivo) consulta o backend. O filtro é
+        reconstruído com os itens vivos para não acumular os vencidos.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        sync_interval: float = REVOCATION_SYNC_INTERVAL
+    ):
+        self.backend = backend or MemoryRevocationBackend()
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self.bloom = BloomFilter(capacity)
+        self._synced_at = 0.0
+        self.fast_negatives = 0
+        self.backend_checks = 0
+        self.revoked_hits = 0
+
+    async def _sync(self):
+        live = await self.backend.keys()
+        capacity = self.capacity
+        while len(live) > capacity:
+            capacity *= 2
+        bloom = BloomFilter(capacity)
+        bloom.update(live)
+        self.bloom = bloom
+        self._synced_at = time.monotonic()
+
+    async def _maybe_sync(self):
+        elapsed = time.monotonic() - self._synced_at
+        if self.backend.shared:
+            if elapsed >= self.sync_interval:
+                await self._sync()
+        elif elapsed >= 60:
+            # Só memória local: reconstrói quando os vencidos dominam o filtro
+            # ou quando ele passou da capacidade (falsos positivos crescem)
+            live = await self.backend.size()
+            if self.bloom.count > max(2 * live, 1024) or self.bloom.count > self.bloom.capacity:
+                await self._sync()
+
+    async def revoke(self, key: str, expires_at: float):
+        if expires_at <= time.time():
+            return
+        await self.backend.add(key, expires_at)
+        self.bloom.add(key)
+
+    async def is_revoked(self, key: str) -> bool:
+        await self._maybe_sync()
+        if self.backend.shared and not self.sync_interval:
+            self.backend_checks += 1
+            revoked = await self.backend.contains(key)
+        elif key not in self.bloom:
+            self.fast_negatives += 1
+            return False
+        else:
+            self.backend_checks += 1
+            revoked = await self.backend.contains(key)
+
+        if revoked:
+            self.revoked_hits += 1
+        return revoked
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "bloom_items": self.bloom.count,
+            "bloom_capacity": self.bloom.capacity,
+            "fast_negatives": self.fast_negatives,
+            "backend_checks": self.backend_checks,
+            "revoked_hits": self.revoked_hits
+        }
+
+
+revocation_store = RevocationStore(_build_backend(REVOCATION_BACKEND))
+
+# Tokens de redefinição de senha por e-mail; vencem junto com o token
+reset_tokens = TTLCache(maxsize=RESET_TOKEN_CACHE_SIZE, ttl=RESET_TOKEN_TTL)
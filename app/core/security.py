@@ -1,8 +1,11 @@
 import bcrypt
 import base64
+import hashlib
 import smtplib
 import os
 import secrets
+import time
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
@@ -15,6 +18,8 @@ from passlib.context import CryptContext
 from typing_extensions import Annotated
 from decouple import config
 from bcrypt import hashpw, gensalt
+from app.utils import TTLCache
+from .hashing import password_hasher
 
 
 pwd_context = CryptContext(
@@ -22,22 +27,30 @@ pwd_context = CryptContext(
     deprecated="auto"
 )
 access_token_expires = timedelta(hours=1)
+# Validade dos tokens emitidos no login/refresh
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=30)
 expires_at = datetime.now(timezone.utc) + access_token_expires
 URL = f'http://localhost:8000' if not "production" in os.environ else f'http://193.203.174.195:8000'
-blacklisted_tokens = []
-password_reset_tokens = {}
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Lidos uma vez na importação, não a cada requisição
+SECRET_KEY = config("SECRET_KEY")
+ALGORITHM = config("ALGORITHM")
+CLAIMS_VERSION = 1
+VERIFIED_CLAIMS_CACHE_SIZE = config("VERIFIED_CLAIMS_CACHE_SIZE", default=10_000, cast=int)
+verified_claims = TTLCache(maxsize=VERIFIED_CLAIMS_CACHE_SIZE)
+
+async def verify_password(plain_password, hashed_password):
+    # bcrypt roda no executor do password_hasher, fora do event loop
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def hash_password(password: str) -> bytes:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 
 def check_password(password: str, hash: str):
@@ -53,16 +66,52 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti identifica o token na revogação (logout)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
 
     encoded_jwt = jwt.encode(
         to_encode, 
-        config("SECRET_KEY"), 
-        algorithm=config("ALGORITHM")
+        SECRET_KEY, 
+        algorithm=ALGORITHM
     )
     return encoded_jwt
 
 
+def issue_access_token(email: str, store_ids: list, expires_delta: timedelta = None) -> str:
+    """
+        Token de acesso com as lojas da conta nos claims, para as rotas
+        responderem "tem loja? qual?" sem ir ao banco. `cv` é a versão
+        do formato dos claims; tokens de outra versão caem no banco.
+    """
+    return create_access_token(
+        data={
+            "sub": email,
+            "store_ids": [str(store_id) for store_id in store_ids],
+            "cv": CLAIMS_VERSION
+        },
+        expires_delta=expires_delta
+    )
+
+
+def decode_access_token(token: str) -> dict:
+    """
+        Claims verificados do token. Um token já verificado fica em cache
+        (chave = hash do token) até o seu `exp`, e as próximas requisições
+        com ele não passam de novo pela verificação da assinatura.
+        Levanta ExpiredSignatureError/JWTError como o jwt.decode.
+    """
+    digest = hashlib.blake2b(token.encode(), digest_size=20).digest()
+    claims = verified_claims.get(digest)
+    if claims is not None:
+        return dict(claims)
+
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    remaining = (claims.get("exp") or 0) - time.time()
+    if remaining > 0:
+        verified_claims.set(digest, claims, ttl=remaining)
+    return dict(claims)
+
+
 async def get_token(token: str = Depends(oauth2_scheme)):
     return token
 
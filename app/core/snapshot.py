@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Optional
+from decouple import config
+from app.utils import TTLCache
+
+
+# "" desliga os snapshots
+CACHE_SNAPSHOT_PATH = config("CACHE_SNAPSHOT_PATH", default="data/cache_snapshot.db")
+CACHE_SNAPSHOT_INTERVAL = config("CACHE_SNAPSHOT_INTERVAL", default=60, cast=float)
+
+
+def _dump_json(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _load_json(raw: bytes):
+    return json.loads(raw)
+
+
+class CacheSnapshot:
+    """
+        Snapshot periódico dos caches em memória (CEP, cotações, rotas)
+        num arquivo SQLite local, para workers novos subirem com o cache
+        quente em vez de disparar chamadas aos provedores.
+
+        Cada gravação gera um arquivo temporário completo e faz troca
+        atômica (os.replace): um crash no meio nunca deixa um snapshot
+        corrompido. A validade é gravada em horário absoluto, então
+        itens vencidos durante o restart não voltam.
+    """
+
+    def __init__(self, path: str = CACHE_SNAPSHOT_PATH, interval: float = CACHE_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._caches: dict = {}
+        self.saved = 0
+        self.loaded = 0
+        self.last_save_ms = 0.0
+
+    def register(
+        self,
+        name: str,
+        cache: TTLCache,
+        dump: Callable = _dump_json,
+        load: Callable = _load_json,
+        load_key: Optional[Callable] = None
+    ):
+        """
+            Inclui o cache no snapshot. `dump`/`load` convertem o valor
+            de/para bytes; `load_key` reconstrói chaves que não são str
+            (ex.: tuplas, gravadas como listas JSON).
+        """
+        self._caches[name] = (cache, dump, load, load_key)
+
+    def _rows(self) -> list:
+        now = time.time()
+        rows = []
+        for name, (cache, dump, _, load_key) in self._caches.items():
+            for key, remaining, value in cache.items():
+                try:
+                    rows.append((
+                        name,
+                        _dump_json(key) if load_key else key,
+                        dump(value),
+                        now + remaining
+                    ))
+                except (TypeError, ValueError):
+                    continue
+        return rows
+
+    def _write(self, rows: list):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.execute(
+                "CREATE TABLE entries (cache TEXT, key BLOB, value BLOB, expires_at REAL)"
+            )
+            connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?)", rows)
+            connection.commit()
+        finally:
+            connection.close()
+
+        with open(tmp_path, "rb") as file:
+            os.fsync(file.fileno())
+        # Cada worker grava o próprio temporário; o último a trocar vence
+        os.replace(tmp_path, self.path)
+
+    def _read(self) -> list:
+        if not os.path.exists(self.path):
+            return []
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            return connection.execute(
+                "SELECT cache, key, value, expires_at FROM entries WHERE expires_at > ?",
+                (time.time(),)
+            ).fetchall()
+        finally:
+            connection.close()
+
+    async def save(self) -> int:
+        if not self.path:
+            return 0
+        started = time.perf_counter()
+        rows = self._rows()
+        await asyncio.to_thread(self._write, rows)
+        self.saved += 1
+        self.last_save_ms = (time.perf_counter() - started) * 1000
+        return len(rows)
+
+    async def load(self) -> int:
+        """Recarrega os itens ainda válidos do último snapshot"""
+        if not self.path:
+            return 0
+        try:
+            rows = await asyncio.to_thread(self._read)
+        except sqlite3.Error as error:
+            print(f"ERROR: funcion {CacheSnapshot.load.__name__} -> error -> {str(error)}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        for name, key, value, expires_at in rows:
+            registered = self._caches.get(name)
+            if registered is None:
+                continue
+            cache, _, load, load_key = registered
+            try:
+                if load_key:
+                    key = load_key(_load_json(key))
+                # Não sobrescreve o que o worker já buscou depois de subir
+                if key not in cache:
+                    cache.set(key, load(value), ttl=expires_at - now)
+                    loaded += 1
+            except (TypeError, ValueError):
+                continue
+
+        self.loaded += loaded
+        return loaded
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as error:
+                print(f"ERROR: funcion {CacheSnapshot.run.__name__} -> error -> {str(error)}")
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "caches": list(self._caches),
+            "saved": self.saved,
+            "loaded": self.loaded,
+            "last_save_ms": round(self.last_save_ms, 2)
+        }
+
+
+cache_snapshot = CacheSnapshot()
@@ -0,0 +1,173 @@
+import json
+import time
+from typing import Optional
+from decouple import config
+from app.utils import TTLCache
+
+
+# Tentativas de login: rajada e recarga (tentativas por segundo)
+LOGIN_IP_BURST = config("LOGIN_IP_BURST", default=20, cast=float)
+LOGIN_IP_RATE = config("LOGIN_IP_RATE", default=20 / 60, cast=float)
+LOGIN_EMAIL_BURST = config("LOGIN_EMAIL_BURST", default=5, cast=float)
+LOGIN_EMAIL_RATE = config("LOGIN_EMAIL_RATE", default=5 / 300, cast=float)
+# Falhas seguidas toleradas antes do bloqueio exponencial
+LOGIN_FREE_FAILURES = config("LOGIN_FREE_FAILURES", default=3, cast=int)
+LOGIN_BACKOFF_BASE = config("LOGIN_BACKOFF_BASE", default=2, cast=float)
+LOGIN_BACKOFF_MAX = config("LOGIN_BACKOFF_MAX", default=60 * 15, cast=float)
+LOGIN_THROTTLE_MAX_ENTRIES = config("LOGIN_THROTTLE_MAX_ENTRIES", default=100_000, cast=int)
+LOGIN_THROTTLE_STATE_TTL = config("LOGIN_THROTTLE_STATE_TTL", default=60 * 60, cast=int)
+# "memory" mantém por worker; "redis://..." compartilha entre workers
+LOGIN_THROTTLE_BACKEND = config("LOGIN_THROTTLE_BACKEND", default="memory")
+
+
+class MemoryThrottleBackend:
+    """Estado por chave num LRU limitado: as chaves mais antigas saem primeiro"""
+
+    def __init__(self, maxsize: int = LOGIN_THROTTLE_MAX_ENTRIES):
+        self.cache = TTLCache(maxsize=maxsize, ttl=LOGIN_THROTTLE_STATE_TTL)
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, state: dict):
+        self.cache.set(key, state)
+
+    def size(self) -> int:
+        return len(self.cache)
+
+
+class RedisThrottleBackend:
+    """Estado no Redis com expiração (requer o pacote redis)"""
+
+    prefix = "lh-login:"
+
+    def __init__(self, url: str):
+        from redis import asyncio as aioredis
+        self.redis = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.redis.get(f"{self.prefix}{key}")
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, state: dict):
+        await self.redis.set(
+            f"{self.prefix}{key}",
+            json.dumps(state),
+            ex=LOGIN_THROTTLE_STATE_TTL
+        )
+
+    def size(self) -> int:
+        return -1
+
+
+def _build_backend(url: str):
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        try:
+            return RedisThrottleBackend(url)
+        except ImportError:
+            print("WARNING: pacote redis não instalado, limite de login fica em memória")
+    return MemoryThrottleBackend()
+
+
+class LoginThrottle:
+    """
+        Limita tentativas de login por IP e por e-mail antes de qualquer
+        consulta ao banco ou bcrypt.
+
+        Cada chave tem um token bucket (rajada + recarga contínua) e um
+        contador de falhas seguidas: passadas LOGIN_FREE_FAILURES, cada
+        nova falha dobra o bloqueio, até LOGIN_BACKOFF_MAX. Um login
+        certo zera as falhas.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryThrottleBackend()
+        self.limits = {
+            "ip": (LOGIN_IP_BURST, LOGIN_IP_RATE),
+            "email": (LOGIN_EMAIL_BURST, LOGIN_EMAIL_RATE)
+        }
+        self.allowed = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _keys(ip: Optional[str], email: str) -> list:
+        keys = [("email", f"email:{email.strip().lower()}")]
+        if ip:
+            keys.append(("ip", f"ip:{ip}"))
+        return keys
+
+    async def _state(self, kind: str, key: str, now: float) -> dict:
+        burst, rate = self.limits[kind]
+        state = await self.backend.get(key) or {
+            "tokens": burst,
+            "updated": now,
+            "failures": 0,
+            "blocked_until": 0.0
+        }
+        state["tokens"] = min(burst, state["tokens"] + (now - state["updated"]) * rate)
+        state["updated"] = now
+        return state
+
+    async def check(self, ip: Optional[str], email: str) -> float:
+        """
+            Consome uma tentativa do IP e do e-mail.
+            RETURN:
+                0 se liberado; senão, segundos até poder tentar de novo.
+        """
+        now = time.time()
+        states = [
+            (kind, key, await self._state(kind, key, now))
+            for kind, key in self._keys(ip, email)
+        ]
+
+        retry_after = 0.0
+        for kind, _, state in states:
+            _, rate = self.limits[kind]
+            retry_after = max(
+                retry_after,
+                state["blocked_until"] - now,
+                (1 - state["tokens"]) / rate if state["tokens"] < 1 else 0.0
+            )
+
+        if retry_after > 0:
+            self.rejected += 1
+            return retry_after
+
+        for _, key, state in states:
+            state["tokens"] -= 1
+            await self.backend.set(key, state)
+        self.allowed += 1
+        return 0.0
+
+    async def record_failure(self, ip: Optional[str], email: str):
+        now = time.time()
+        for kind, key in self._keys(ip, email):
+            state = await self._state(kind, key, now)
+            state["failures"] += 1
+            excess = state["failures"] - LOGIN_FREE_FAILURES
+            if excess > 0:
+                state["blocked_until"] = now + min(
+                    LOGIN_BACKOFF_MAX,
+                    LOGIN_BACKOFF_BASE * 2 ** (excess - 1)
+                )
+            await self.backend.set(key, state)
+
+    async def record_success(self, ip: Optional[str], email: str):
+        now = time.time()
+        for kind, key in self._keys(ip, email):
+            state = await self._state(kind, key, now)
+            if state["failures"] or state["blocked_until"]:
+                state["failures"] = 0
+                state["blocked_until"] = 0.0
+                await self.backend.set(key, state)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "tracked": self.backend.size(),
+            "allowed": self.allowed,
+            "rejected": self.rejected
+        }
+
+
+login_throttle = LoginThrottle(_build_backend(LOGIN_THROTTLE_BACKEND))
@@ -2,12 +2,20 @@ import os
 import uvicorn
 import asyncio
 from decouple import config
+import math
+from fastapi import Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi_sqlalchemy import DBSessionMiddleware
 from app.api.v1.routers import router as api_routes
 from app.core.config import app, Base
+from app.core.http import http_clients
+from app.core.hashing import password_hasher
+from app.core.snapshot import cache_snapshot
+from app.services import backfill_store_locations, quote_demand
 from app.db.session import postgresql, session
+from app.utils import ProviderUnavailableError, RateLimitedError
 
 
 URL_local = "http://localhost:8000" if config("ENV") == "DEV" \
@@ -23,6 +31,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Token reemitido na criação de loja (ver endpoints/stores.py)
+    expose_headers=["X-Access-Token"],
 )
 app.add_middleware(
     DBSessionMiddleware,
@@ -35,6 +45,23 @@ app.add_middleware(
 )
 app.include_router(api_routes, prefix="/api")
 
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError):
+    # Cota do provedor externo esgotada: recusa rápida em vez de esperar
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+@app.exception_handler(ProviderUnavailableError)
+async def provider_unavailable_handler(request: Request, exc: ProviderUnavailableError):
+    # Provedor fora do ar (erro ou circuito aberto): indisponível, não "não encontrado"
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)}
+    )
+
 async def create_tables():
     async with postgresql.get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -42,6 +69,20 @@ async def create_tables():
 @app.on_event("startup")
 async def startup():
     await create_tables()
+    await http_clients.startup()
+    # Sobe com os caches do último snapshot (CEP, cotações, rotas)
+    await cache_snapshot.load()
+    app.state.cache_snapshot = asyncio.create_task(cache_snapshot.run())
+    app.state.store_backfill = asyncio.create_task(backfill_store_locations())
+    app.state.quote_prefetch = asyncio.create_task(quote_demand.run())
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.quote_prefetch.cancel()
+    app.state.cache_snapshot.cancel()
+    await cache_snapshot.save()
+    password_hasher.shutdown()
+    await http_clients.shutdown()
 
 if __name__ == "__main__":
     uvicorn.run(
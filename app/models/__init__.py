@@ -12,4 +12,6 @@ from .cart import (
     CartModel,
     get_user_cart,
     add_to_cart
-)
\ No newline at end of file
+)
+from .cep import CepCacheModel
+from .delivery_zone import StoreDeliveryZoneModel
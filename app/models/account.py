@@ -1,7 +1,6 @@
 import traceback
 import uuid
 from typing import Optional, Any
-from datetime import datetime, timezone
 from fastapi import (
     HTTPException, 
     UploadFile, 
@@ -27,12 +26,30 @@ from decouple import config
 from app.db.session import session as db_session, upload_image
 from app.core import ( 
     verify_password, 
-    blacklisted_tokens,
+    revocation_store,
+    token_key,
+    decode_access_token,
     oauth2_scheme,
     Base
 )
 from app.db import get_async_session
 from app.schemas import AccountInput, TokenData
+from app.utils import TTLCache
+
+
+PRINCIPAL_CACHE_SIZE = config("PRINCIPAL_CACHE_SIZE", default=10_000, cast=int)
+PRINCIPAL_CACHE_TTL = config("PRINCIPAL_CACHE_TTL", default=60, cast=int)
+# Conta autenticada por e-mail; limpo quando a conta muda ou ganha loja
+principals = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_principal(email: Optional[str] = None, account_id=None):
+    if email is not None:
+        principals.pop(email)
+    if account_id is not None:
+        for key, _, principal in principals.items():
+            if principal["id"] == account_id:
+                principals.pop(key)
 
 
 class AccountModel(Base):
@@ -70,7 +87,7 @@ class AccountModel(Base):
 
         print(f'ACCOUNT OBJ::: {account}')
 
-        password = hash_password(account.password)
+        password = await hash_password(account.password)
         new_account = cls(
             email=account.email,
             password=password
@@ -174,28 +191,40 @@ class AccountModel(Base):
 
     @classmethod
     async def get_user_email(cls, email: str, session: AsyncSession):
-        # query = db_session.query(
-        #     AccountModel.id.label("id"),
-        #     AccountModel.email.label("email"),
-        # ).filter(AccountModel.email==email)
-        # query = query.all()
+        """
+            Principal autenticado {id, email, store_id}, em cache por
+            e-mail (TTL curto). Só busca as colunas necessárias, sem a
+            entidade inteira (e o blob profile_picture).
+        """
+        from app.models.store import StoreModel
+
+        cached = principals.get(email)
+        if cached is not None:
+            return dict(cached)
+
         query = await session.execute(
             select(
-                cls,
                 cls.id.label("id"),
-                cls.email.label("email")
+                cls.email.label("email"),
+                select(StoreModel.id)
+                .where(StoreModel.account_id == cls.id)
+                .limit(1)
+                .scalar_subquery()
+                .label("store_id")
             ).where(
                 cls.email==email
             )
         )
         result = query.first()
-        print(f'RESULTS::: {result}')
         try:
             if result:
-                return {
-                    "id": result[1],
-                    "email": result[2]
+                principal = {
+                    "id": result.id,
+                    "email": result.email,
+                    "store_id": result.store_id
                 }
+                principals.set(email, principal)
+                return dict(principal)
         except Exception as error:
             print(error)
             traceback.print_exc()
@@ -203,6 +232,17 @@ class AccountModel(Base):
             await db_session.close()
 
 
+    @classmethod
+    async def get_store_ids(cls, account_id, session: AsyncSession) -> list:
+        """Ids das lojas da conta (vão para os claims do token)"""
+        from app.models.store import StoreModel
+
+        result = await session.execute(
+            select(StoreModel.id)
+            .where(StoreModel.account_id == account_id)
+        )
+        return list(result.scalars().all())
+
     def dict_columns(query) -> dict:
         return [{
             "id": data[0],
@@ -219,7 +259,7 @@ class AccountModel(Base):
         user = await cls.get_password_email(email, session)
         print(f'AUTH USER::: {user}')
         
-        if not user or not verify_password(password, user["password"]):
+        if not user or not await verify_password(password, user["password"]):
             return None
         
         return user
@@ -238,19 +278,18 @@ class AccountModel(Base):
 
         try:
             # Decodifica o token
-            payload = jwt.decode(token, config("SECRET_KEY"), algorithms=[config("ALGORITHM")])
+            payload = decode_access_token(token)
             username: str = payload.get("sub")
             exps: int = payload.get("exp")
 
             if username is None:
                 raise credentials_exception
 
-            if token in blacklisted_tokens:
+            if await revocation_store.is_revoked(token_key(token, payload)):
                 raise credentials_exception
 
-            # Verifica se o token expirou
-            if exps is None or datetime.fromtimestamp(exps, tz=timezone.utc) < datetime.now(timezone.utc):
-                print("Token expirado ou inválido")
+            # O `exp` já foi validado no decode (e o cache não passa dele)
+            if exps is None:
                 raise credentials_exception
 
             token_data = TokenData(username=username, expires=exps)
@@ -288,4 +327,12 @@ class AccountModel(Base):
         current_user: Any = Depends(get_current_user_dep)) -> Any:
         if not current_user:
             raise HTTPException(status_code=400, detail="Inactive user")
-        return current_user
\ No newline at end of file
+        return current_user
+
+
+@db.event.listens_for(AccountModel, "after_update")
+@db.event.listens_for(AccountModel, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    history = db.inspect(target).attrs.email.history
+    for email in (*history.deleted, target.email):
+        invalidate_principal(email=email)
@@ -0,0 +1,36 @@
+from sqlalchemy import (
+    Column,
+    Float,
+    String,
+    DateTime
+)
+from sqlalchemy import func
+from app.core import Base
+
+
+class CepCacheModel(Base):
+    __tablename__ = "tb_cep_cache"
+
+    cep = Column(String(8), primary_key=True)
+    logradouro = Column(String(255))
+    bairro = Column(String(255))
+    localidade = Column(String(100))
+    uf = Column(String(2))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "cep": self.cep,
+            "logradouro": self.logradouro,
+            "bairro": self.bairro,
+            "localidade": self.localidade,
+            "uf": self.uf,
+            "latitude": self.latitude,
+            "longitude": self.longitude
+        }
@@ -0,0 +1,31 @@
+from sqlalchemy import (
+    Column,
+    Float,
+    String,
+    ForeignKey,
+    DateTime
+)
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core import Base
+
+
+class StoreDeliveryZoneModel(Base):
+    """Taxa/distância/prazo pré-calculados por loja e prefixo de CEP (5 dígitos)"""
+    __tablename__ = "tb_store_delivery_zone"
+
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('tb_store.id', ondelete="CASCADE"),
+        primary_key=True
+    )
+    cep_prefix = Column(String(5), primary_key=True)
+    delivery_fee = Column(Float, nullable=False)
+    distance_km = Column(Float, nullable=False)
+    estimated_time = Column(String(30), nullable=False)
+    # CEP/taxa/coordenadas da loja usados no cálculo; se mudarem, a linha vence
+    signature = Column(String(120), nullable=False)
+    computed_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
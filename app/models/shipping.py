@@ -1,12 +1,15 @@
+import traceback
 import uuid
 from sqlalchemy import (
     Column, 
     Float, 
+    Integer,
     String,
     Boolean,
     JSON
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import Base
 
 
@@ -26,3 +29,63 @@ class ShippingRuleModel(Base):
     formula = Column(String(255)) 
     origin_cep_ranges = Column(JSON) 
     is_active = Column(Boolean, default=True)
+    # Incrementado a cada alteração da regra (invalida a fórmula compilada)
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1"
+    )
+
+    @classmethod
+    async def add(
+        cls,
+        rule: dict,
+        session: AsyncSession
+    ):
+        from app.services.rules import shipping_rules
+
+        try:
+            new_rule = cls(**rule)
+            session.add(new_rule)
+            await session.commit()
+            await session.refresh(new_rule)
+            shipping_rules.invalidate()
+
+            return new_rule
+
+        except Exception as error:
+            await session.rollback()
+            traceback.print_exc()
+            raise error
+
+    @classmethod
+    async def update(
+        cls,
+        rule_id,
+        update_data: dict,
+        session: AsyncSession
+    ):
+        from app.services.rules import shipping_rules
+
+        try:
+            db_item = await session.get(cls, rule_id)
+            if not db_item:
+                return None
+
+            for key, value in update_data.items():
+                if hasattr(db_item, key):
+                    setattr(db_item, key, value)
+            # Invalida a fórmula compilada; os outros workers percebem pelo fingerprint
+            db_item.version = (db_item.version or 0) + 1
+
+            await session.commit()
+            await session.refresh(db_item)
+            shipping_rules.invalidate()
+
+            return db_item
+
+        except Exception as error:
+            await session.rollback()
+            traceback.print_exc()
+            raise error
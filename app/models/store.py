@@ -8,6 +8,7 @@ from sqlalchemy import (
     ForeignKey, 
     Float
 )
+from sqlalchemy import event
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -35,6 +36,10 @@ class StoreModel(Base):
         Float,
         default=0.0
     )
+    # Preenchidos a partir do CEP (ver services/store.py)
+    city = Column(String(100))
+    latitude = Column(Float)
+    longitude = Column(Float)
     account_id = Column(
         UUID(as_uuid=True),
         ForeignKey('tb_account.id'),
@@ -60,19 +65,51 @@ class StoreModel(Base):
         store,
         session: AsyncSession
     ):
+        from app.services import locate_store, store_locator, delivery_zones
+
         try:
             new_store = cls(
                 name=store.name,
                 description=store.description,
                 address=store.address,
+                cep=store.cep,
+                delivery_fee=store.delivery_fee,
                 account_id=store.account_id
             )
+            await locate_store(new_store)
             session.add(new_store)
             await session.commit()
             await session.refresh(new_store)
+            store_locator.invalidate()
+            delivery_zones.schedule(new_store.id)
 
             return new_store
 
         except Exception as error:
             print(error)
-            traceback.print_exc()
\ No newline at end of file
+            traceback.print_exc()
+
+
+@event.listens_for(StoreModel.cep, "set", active_history=True)
+def _reset_location(target, value, oldvalue, initiator):
+    # CEP novo invalida cidade/coordenadas; _relocate volta a preenchê-las
+    if value != oldvalue:
+        target.city = None
+        target.latitude = None
+        target.longitude = None
+
+
+@event.listens_for(StoreModel, "after_update")
+def _relocate(mapper, connection, target):
+    # Loja sem localização após o update (CEP trocado): geocodifica em segundo plano
+    if target.latitude is None and target.id is not None:
+        from app.services.store import schedule_relocation
+        schedule_relocation(target.id, target.cep)
+
+
+@event.listens_for(StoreModel, "after_insert")
+@event.listens_for(StoreModel, "after_delete")
+def _invalidate_owner(mapper, connection, target):
+    # O principal em cache traz o store_id do dono
+    from app.models.account import invalidate_principal
+    invalidate_principal(account_id=target.account_id)
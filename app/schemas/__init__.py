@@ -14,8 +14,13 @@ from .order import (
 from .shipping import (
     LocalDeliveryResponse,
     LocalDeliveryRequest,
+    ShippingItem,
     ShippingCalculateRequest,
-    ShippingOptionResponse
+    ShippingOptionResponse,
+    ShippingBatchRequest,
+    ShippingBatchResponse,
+    StoreDeliveryOption,
+    CEP_PATTERN
 )
 from .cart import (
     CartItemCreate, 
@@ -1,22 +1,71 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional
 from uuid import UUID
 
 
-class ShippingCalculateRequest(BaseModel):
-    origin_cep: str
-    destination_cep: str
+# CEP com ou sem hífen (8 dígitos)
+CEP_PATTERN = r"^\d{5}-?\d{3}$"
+
+
+def normalize_cep(v: str) -> str:
+    v = v.replace("-", "").strip()
+    if len(v) != 8 or not v.isdigit():
+        raise ValueError("CEP inválido")
+    return v
+
+
+class ShippingItem(BaseModel):
     weight: float  # kg
     length: float  # cm
     height: float  # cm
     width: float  # cm
+    quantity: int = Field(1, ge=1)
+
+
+class ShippingCalculateRequest(BaseModel):
+    store_id: Optional[UUID] = None
+    origin_cep: str
+    destination_cep: str
+    # Pacote único informado pelo cliente ou os itens do carrinho
+    weight: Optional[float] = None  # kg
+    length: Optional[float] = None  # cm
+    height: Optional[float] = None  # cm
+    width: Optional[float] = None  # cm
+    items: Optional[List[ShippingItem]] = Field(None, min_length=1, max_length=100)
 
     @field_validator('origin_cep', 'destination_cep')
     def validate_cep(cls, v):
-        v = v.replace("-", "").strip()
-        if len(v) != 8 or not v.isdigit():
-            raise ValueError("CEP inválido")
-        return v
+        return normalize_cep(v)
+
+    @model_validator(mode="after")
+    def validate_parcel(self):
+        if self.items:
+            # Regras customizadas usam o peso total e as maiores medidas
+            if self.weight is None:
+                self.weight = sum(item.weight * item.quantity for item in self.items)
+            self.length = self.length or max(item.length for item in self.items)
+            self.height = self.height or max(item.height for item in self.items)
+            self.width = self.width or max(item.width for item in self.items)
+        elif None in (self.weight, self.length, self.height, self.width):
+            raise ValueError("Informe peso e dimensões do pacote ou os itens do carrinho")
+        return self
+
+
+class ShippingBatchRequest(BaseModel):
+    store_id: Optional[UUID] = None
+    requests: List[ShippingCalculateRequest] = Field(..., min_length=1, max_length=50)
+
+    @model_validator(mode="after")
+    def validate_store(self):
+        # O lote é calculado para uma única loja
+        store_ids = {request.store_id for request in self.requests} | {self.store_id}
+        store_ids.discard(None)
+        if len(store_ids) > 1:
+            raise ValueError("Todas as requisições do lote devem ser da mesma loja")
+        if store_ids:
+            self.store_id = store_ids.pop()
+        return self
+
 
 class ShippingOptionResponse(BaseModel):
     carrier: str
@@ -24,6 +73,7 @@ class ShippingOptionResponse(BaseModel):
     cost: float
     delivery_time: int  
     description: Optional[str] = None
+    stale: bool = False  # Cotação do cache servida com o provedor fora do ar
 
 
 class LocalDeliveryRequest(BaseModel):
@@ -31,8 +81,25 @@ class LocalDeliveryRequest(BaseModel):
     destination_cep: str
     destination_address: str  # Opcional para cálculo por endereço exato
 
+    @field_validator('destination_cep')
+    def validate_cep(cls, v):
+        return normalize_cep(v)
+
 class LocalDeliveryResponse(BaseModel):
     is_local: bool
     delivery_fee: float
     estimated_time: str  # Ex: "30-45 minutos"
-    distance_km: Optional[float] = None
\ No newline at end of file
+    distance_km: Optional[float] = None
+
+
+class ShippingBatchResponse(BaseModel):
+    results: List[List[ShippingOptionResponse]]
+    partial: List[str] = []
+
+
+class StoreDeliveryOption(BaseModel):
+    store_id: UUID
+    name: str
+    delivery_fee: float
+    estimated_time: str
+    distance_km: float
@@ -1,4 +1,20 @@
 from .inventory import reserve_inventory, release_inventory
 from .payment import process_payment
-from .shipping import ShippingCalculator, LocalDeliveryCalculator
-from .gateways.stripe import handle_successful_payment, stripe as stripe_client
\ No newline at end of file
+from .cep import CepResolver, cep_resolver
+from .quotes import CorreiosQuoteCache, correios_quotes
+from .prefetch import QuoteDemand, quote_demand
+from .rules import ShippingRuleRegistry, shipping_rules
+from .store import (
+    locate_store,
+    relocate_store,
+    schedule_relocation,
+    backfill_store_locations
+)
+from .shipping import (
+    ShippingCalculator,
+    LocalDeliveryCalculator,
+    provider_timings
+)
+from .store_locator import StoreLocator, store_locator
+from .delivery_zones import DeliveryZoneBuilder, delivery_zones
+from .gateways.stripe import handle_successful_payment, stripe as stripe_client
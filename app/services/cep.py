@@ -0,0 +1,230 @@
+# services/cep.py
+import asyncio
+import httpx
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from decouple import config
+from app.core.http import http_clients
+from app.core.snapshot import cache_snapshot
+from app.db.session import AsyncSessionLocal
+from app.models import CepCacheModel
+from app.services.geoindex import cep_index
+from app.utils import TTLCache, SingleFlight, ProviderUnavailableError
+
+
+CEP_CACHE_SIZE = config("CEP_CACHE_SIZE", default=10000, cast=int)
+CEP_CACHE_TTL = config("CEP_CACHE_TTL", default=60 * 60 * 6, cast=int)
+CEP_CACHE_DB_TTL_DAYS = config("CEP_CACHE_DB_TTL_DAYS", default=90, cast=int)
+
+
+def normalize_cep(cep: str) -> str:
+    return cep.replace("-", "").strip()
+
+
+def _client_error(response: httpx.Response) -> bool:
+    """4xx é erro da nossa requisição (ex.: CEP malformado), não do provedor"""
+    return response.is_client_error and response.status_code != 429
+
+
+class CepResolver:
+    """
+        Resolve CEPs (endereço e coordenadas) com cache em dois níveis:
+        LRU em memória com TTL na frente da tabela `tb_cep_cache`.
+        Só consulta ViaCEP/Nominatim quando o CEP não está em nenhum dos dois.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = CEP_CACHE_SIZE,
+        ttl: int = CEP_CACHE_TTL,
+        db_ttl_days: int = CEP_CACHE_DB_TTL_DAYS
+    ):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+        self.db_ttl = timedelta(days=db_ttl_days)
+        self.db_hits = 0
+        self.db_misses = 0
+        self.viacep_calls = 0
+        self.geocoder_calls = 0
+        self.stale_served = 0
+
+    async def get_address(self, cep: str) -> dict:
+        """Retorna os dados do CEP (logradouro, bairro, localidade, uf...)"""
+        cep = normalize_cep(cep)
+        entry = self.cache.get(cep)
+        if entry is not None:
+            return entry
+
+        # Requisições simultâneas do mesmo CEP compartilham uma única consulta
+        return await self._flight.do(("address", cep), self._resolve_address, cep)
+
+    async def _resolve_address(self, cep: str) -> dict:
+        entry = await self._load(cep)
+        if entry is None:
+            try:
+                entry = await self._fetch_address(cep)
+            except ProviderUnavailableError:
+                # ViaCEP fora do ar: usa o registro vencido do banco, se houver
+                entry = await self._load(cep, allow_stale=True)
+                if entry is None:
+                    raise
+                self.stale_served += 1
+                return entry
+            await self._store(entry)
+
+        self.cache.set(cep, entry)
+        return entry
+
+    async def get_coordinates(self, cep: str) -> tuple:
+        """Retorna (latitude, longitude) do CEP, geocodificando só na primeira vez"""
+        # O índice offline responde sem nenhuma chamada externa
+        coords = cep_index.lookup(cep)
+        if coords is not None:
+            return coords
+
+        entry = await self.get_address(cep)
+        if entry.get("latitude") is None or entry.get("longitude") is None:
+            return await self._flight.do(
+                ("coordinates", entry["cep"]),
+                self._resolve_coordinates,
+                entry
+            )
+
+        return (entry["latitude"], entry["longitude"])
+
+    async def _resolve_coordinates(self, entry: dict) -> tuple:
+        latitude, longitude = await self._geocode(entry)
+        entry = {**entry, "latitude": latitude, "longitude": longitude}
+        await self._store(entry)
+        self.cache.set(entry["cep"], entry)
+        cep_index.add_overlay(entry["cep"], latitude, longitude)
+
+        return (latitude, longitude)
+
+    async def _load(self, cep: str, allow_stale: bool = False) -> Optional[dict]:
+        try:
+            async with AsyncSessionLocal() as session:
+                row = await session.get(CepCacheModel, cep)
+        except Exception as error:
+            print(f"ERROR: funcion {CepResolver._load.__name__} -> error -> {str(error)}")
+            return None
+
+        if row is None or (
+            not allow_stale and
+            row.updated_at and
+            row.updated_at < datetime.now(timezone.utc) - self.db_ttl
+        ):
+            self.db_misses += 1
+            return None
+
+        self.db_hits += 1
+        return row.to_dict()
+
+    async def _store(self, entry: dict):
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.merge(CepCacheModel(**entry))
+                await session.commit()
+        except Exception as error:
+            print(f"ERROR: funcion {CepResolver._store.__name__} -> error -> {str(error)}")
+
+    async def _fetch_address(self, cep: str) -> dict:
+        # Cota antes do breaker: uma recusa não consome a sonda do half-open
+        await http_clients.limiter("viacep").acquire()
+        breaker = http_clients.breaker("viacep")
+        breaker.check()
+
+        self.viacep_calls += 1
+        data = None
+        try:
+            response = await http_clients.get("viacep").get(
+                f"/ws/{cep}/json/"
+            )
+            if not _client_error(response):
+                response.raise_for_status()
+                data = response.json()
+                if not isinstance(data, dict):
+                    raise ValueError("resposta inesperada")
+        except asyncio.CancelledError:
+            breaker.record_failure()
+            raise
+        except Exception as e:
+            # 5xx, timeout, rede ou corpo inválido (ex.: página de manutenção)
+            breaker.record_failure()
+            raise ProviderUnavailableError("viacep", f"Erro na API: {str(e)}")
+        breaker.record_success()
+
+        if data is None:
+            raise ValueError("CEP inválido")
+        if "erro" in data:
+            raise ValueError("CEP não encontrado")
+
+        return {
+            "cep": cep,
+            "logradouro": data.get("logradouro", ""),
+            "bairro": data.get("bairro", ""),
+            "localidade": data.get("localidade", ""),
+            "uf": data.get("uf", ""),
+            "latitude": None,
+            "longitude": None
+        }
+
+    async def _geocode(self, entry: dict) -> tuple:
+        # Monta o endereço para geocodificação
+        address = (
+            f"{entry.get('logradouro', '')}, "
+            f"{entry.get('bairro', '')}, "
+            f"{entry.get('localidade', '')}, "
+            f"{entry.get('uf', '')}"
+        )
+
+        # Cota antes do breaker: uma recusa não consome a sonda do half-open
+        await http_clients.limiter("nominatim").acquire()
+        breaker = http_clients.breaker("nominatim")
+        breaker.check()
+
+        self.geocoder_calls += 1
+        results = None
+        try:
+            response = await http_clients.get("nominatim").get(
+                "/search",
+                params={
+                    "q": address,
+                    "format": "json",
+                    "limit": 1
+                }
+            )
+            if not _client_error(response):
+                response.raise_for_status()
+                results = response.json()
+                if not isinstance(results, list):
+                    raise ValueError("resposta inesperada")
+                coords = (float(results[0]["lat"]), float(results[0]["lon"])) if results else None
+        except asyncio.CancelledError:
+            breaker.record_failure()
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            raise ProviderUnavailableError("nominatim", f"Erro na API: {str(e)}")
+        breaker.record_success()
+
+        if not results:
+            raise ValueError("Endereço não encontrado")
+
+        return coords
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.cache.stats(),
+            "index": cep_index.stats(),
+            "coalesced": self._flight.stats(),
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "viacep_calls": self.viacep_calls,
+            "geocoder_calls": self.geocoder_calls,
+            "stale_served": self.stale_served
+        }
+
+
+cep_resolver = CepResolver()
+cache_snapshot.register("cep", cep_resolver.cache)
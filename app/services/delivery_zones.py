@@ -0,0 +1,197 @@
+# services/delivery_zones.py
+import asyncio
+import math
+from typing import Optional
+from uuid import UUID
+import numpy as np
+from sqlalchemy import delete
+from app.db.session import AsyncSessionLocal
+from app.models import StoreModel, StoreDeliveryZoneModel
+from app.schemas import LocalDeliveryResponse
+from app.services.cep import cep_resolver
+from app.services.geoindex import cep_index
+from app.services.shipping import LocalDeliveryCalculator
+from app.services.store_locator import MAX_LOCAL_DISTANCE_KM, haversine_km
+from app.utils import current_tenant, BACKGROUND_TENANT, RateLimitedError
+
+
+def zone_signature(store: StoreModel) -> str:
+    """Dados da loja que entram no cálculo; se mudarem, as zonas vencem"""
+    return f"{store.cep}|{store.delivery_fee or 0.0}|{store.latitude}|{store.longitude}"
+
+
+class DeliveryZoneBuilder:
+    """
+        Pré-calcula, por loja, a taxa/distância/prazo da entrega local
+        para cada prefixo de CEP (5 dígitos) da mesma cidade dentro de
+        MAX_LOCAL_DISTANCE_KM, usando os CEPs do índice offline.
+
+        Com isso o /shipping/local vira uma busca pela chave
+        (loja, prefixo). Linhas com assinatura diferente da loja atual
+        (CEP/taxa mudaram) são ignoradas e a tabela é recalculada em
+        segundo plano; enquanto isso vale o cálculo ao vivo.
+    """
+
+    def __init__(self):
+        self.calculator = LocalDeliveryCalculator()
+        self._tasks: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    def schedule(self, store_id: UUID):
+        """Agenda o recálculo das zonas da loja (uma execução por vez)"""
+        if store_id in self._tasks:
+            return
+        task = asyncio.create_task(self.build(store_id))
+        self._tasks[store_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(store_id, None))
+
+    def _nearby_prefixes(self, store: StoreModel) -> tuple:
+        """
+            Agrupa por prefixo os CEPs do índice próximos da loja.
+            RETURN:
+                (prefixos, CEP representativo, latitude e longitude médias)
+        """
+        records = cep_index.as_array()
+        if not len(records):
+            return (np.empty(0, dtype=np.uint32),) * 2 + (np.empty(0),) * 2
+
+        # Pré-filtro por caixa de coordenadas antes do haversine
+        delta_lat = MAX_LOCAL_DISTANCE_KM / 110.574
+        delta_lon = MAX_LOCAL_DISTANCE_KM / (
+            111.320 * max(math.cos(math.radians(store.latitude)), 0.01)
+        )
+        box = (
+            (np.abs(records["latitude"] - store.latitude) <= delta_lat)
+            & (np.abs(records["longitude"] - store.longitude) <= delta_lon)
+        )
+        records = records[box]
+
+        prefixes, first, inverse = np.unique(
+            records["cep"] // 1000,
+            return_index=True,
+            return_inverse=True
+        )
+        counts = np.bincount(inverse)
+        latitudes = np.bincount(inverse, weights=records["latitude"]) / counts
+        longitudes = np.bincount(inverse, weights=records["longitude"]) / counts
+        return prefixes, records["cep"][first], latitudes, longitudes
+
+    async def _same_city(self, ceps: np.ndarray, city: str) -> np.ndarray:
+        same_city = np.zeros(len(ceps), dtype=bool)
+        for index, cep in enumerate(ceps.tolist()):
+            while True:
+                try:
+                    address = await cep_resolver.get_address(f"{cep:08d}")
+                    break
+                except RateLimitedError as error:
+                    # Job em segundo plano: espera a cota em vez de perder o prefixo
+                    await asyncio.sleep(error.retry_after)
+                except ValueError:
+                    address = None
+                    break
+            if address is None:
+                continue
+            same_city[index] = address.get("localidade") == city
+        return same_city
+
+    async def build(self, store_id: UUID) -> int:
+        """
+            Recalcula as zonas de entrega da loja.
+            RETURN:
+                Quantidade de prefixos atendidos.
+        """
+
+        current_tenant.set(BACKGROUND_TENANT)
+        try:
+            async with AsyncSessionLocal() as session:
+                store = await session.get(StoreModel, store_id)
+                if store is None or store.latitude is None or not store.city:
+                    return 0
+
+                prefixes, ceps, latitudes, longitudes = self._nearby_prefixes(store)
+                distances = haversine_km(
+                    math.radians(store.latitude),
+                    math.radians(store.longitude),
+                    np.radians(latitudes),
+                    np.radians(longitudes)
+                )
+                within = distances <= MAX_LOCAL_DISTANCE_KM
+                prefixes, ceps, distances = prefixes[within], ceps[within], distances[within]
+
+                same_city = await self._same_city(ceps, store.city)
+                prefixes, distances = prefixes[same_city], distances[same_city]
+
+                fees = self.calculator.fees(
+                    distances,
+                    np.full(len(distances), store.delivery_fee or 0.0)
+                )
+                times = self.calculator.estimate_times(distances)
+                signature = zone_signature(store)
+
+                await session.execute(
+                    delete(StoreDeliveryZoneModel)
+                    .where(StoreDeliveryZoneModel.store_id == store.id)
+                )
+                session.add_all([
+                    StoreDeliveryZoneModel(
+                        store_id=store.id,
+                        cep_prefix=f"{prefix:05d}",
+                        delivery_fee=round(fee, 2),
+                        distance_km=round(distance, 2),
+                        estimated_time=estimated_time,
+                        signature=signature
+                    )
+                    for prefix, fee, estimated_time, distance in zip(
+                        prefixes.tolist(),
+                        fees.tolist(),
+                        times,
+                        distances.tolist()
+                    )
+                ])
+                await session.commit()
+                self.builds += 1
+                return len(prefixes)
+        except Exception as error:
+            print(f"ERROR: funcion {DeliveryZoneBuilder.build.__name__} -> store {store_id} -> error -> {str(error)}")
+            return 0
+
+    async def lookup(
+        self,
+        store: StoreModel,
+        destination_cep: str,
+        session
+    ) -> Optional[LocalDeliveryResponse]:
+        """Zona pré-calculada para o CEP ou None (usar o cálculo ao vivo)"""
+        prefix = destination_cep.replace("-", "").strip()[:5]
+        zone = await session.get(StoreDeliveryZoneModel, (store.id, prefix))
+
+        if zone is None:
+            self.misses += 1
+            return None
+        if zone.signature != zone_signature(store):
+            self.misses += 1
+            self.schedule(store.id)
+            return None
+
+        self.hits += 1
+        return LocalDeliveryResponse(
+            is_local=True,
+            delivery_fee=zone.delivery_fee,
+            estimated_time=zone.estimated_time,
+            distance_km=zone.distance_km
+        )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "builds": self.builds,
+            "building": len(self._tasks)
+        }
+
+
+delivery_zones = DeliveryZoneBuilder()
@@ -0,0 +1,222 @@
+# services/geoindex.py
+"""
+    Índice offline CEP -> coordenadas.
+
+    O arquivo gerado é um array ordenado de registros de tamanho fixo
+    (cep: uint32, latitude: float32, longitude: float32) precedido por
+    um cabeçalho. As consultas mapeiam o arquivo em memória (mmap) e
+    fazem busca binária, sem carregar o conjunto de dados no processo.
+
+    Para gerar o índice a partir de um CSV com as colunas
+    `cep,latitude,longitude`:
+
+        python -m app.services.geoindex dados/ceps.csv data/cep_index.bin
+"""
+import csv
+import mmap
+import os
+import struct
+import sys
+from typing import Optional
+import numpy as np
+from decouple import config
+
+
+CEP_INDEX_PATH = config("CEP_INDEX_PATH", default="data/cep_index.bin")
+
+MAGIC = b"LHCEPIDX"
+HEADER = struct.Struct("<8sII")  # magic, versão, quantidade de registros
+RECORD = struct.Struct("<Iff")  # cep, latitude, longitude
+KEY = struct.Struct("<I")
+RECORD_DTYPE = np.dtype([("cep", "<u4"), ("latitude", "<f4"), ("longitude", "<f4")])
+VERSION = 1
+
+LATITUDE_COLUMNS = ("latitude", "lat")
+LONGITUDE_COLUMNS = ("longitude", "lon", "lng")
+
+
+def _cep_key(cep: str) -> Optional[int]:
+    digits = str(cep).replace("-", "").strip()
+    if len(digits) != 8 or not digits.isdigit():
+        return None
+    return int(digits)
+
+
+def _read_csv(path: str) -> dict:
+    """Lê um CSV de CEPs e retorna {cep: (latitude, longitude)}"""
+    rows = {}
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        columns = {name.lower(): name for name in reader.fieldnames or []}
+        lat_column = next(columns[c] for c in LATITUDE_COLUMNS if c in columns)
+        lon_column = next(columns[c] for c in LONGITUDE_COLUMNS if c in columns)
+
+        for row in reader:
+            key = _cep_key(row[columns["cep"]])
+            try:
+                coords = (float(row[lat_column]), float(row[lon_column]))
+            except (TypeError, ValueError):
+                continue
+            if key is not None:
+                rows[key] = coords
+    return rows
+
+
+def build_index(
+    csv_path: str,
+    output_path: str = CEP_INDEX_PATH,
+    overlay_path: Optional[str] = None
+) -> int:
+    """
+        Gera o arquivo de índice a partir do CSV. As coordenadas já
+        gravadas no overlay (geocodificadas pelo Nominatim) são
+        incorporadas ao novo índice.
+        RETURN:
+            Quantidade de CEPs no índice.
+    """
+
+    rows = _read_csv(csv_path)
+    overlay_path = overlay_path or f"{output_path}.overlay.csv"
+    if os.path.exists(overlay_path):
+        for key, coords in _read_csv(overlay_path).items():
+            rows.setdefault(key, coords)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(rows)))
+        for key in sorted(rows):
+            latitude, longitude = rows[key]
+            file.write(RECORD.pack(key, latitude, longitude))
+
+    # Troca atômica: workers que já mapearam o arquivo antigo seguem válidos
+    os.replace(tmp_path, output_path)
+    return len(rows)
+
+
+class CepIndex:
+    """
+        Consulta o índice CEP -> coordenadas via mmap + busca binária.
+        CEPs ausentes do índice são resolvidos por quem chama e gravados
+        no overlay com `add_overlay`.
+    """
+
+    def __init__(self, path: str = CEP_INDEX_PATH, overlay_path: Optional[str] = None):
+        self.path = path
+        self.overlay_path = overlay_path or f"{path}.overlay.csv"
+        self._mmap = None
+        self._count = 0
+        self._overlay = None
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self) -> bool:
+        if self._mmap is not None:
+            return True
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            print(f"ERROR: índice de CEPs inválido em {self.path}")
+            return False
+
+        self._mmap = mapped
+        self._count = count
+        return True
+
+    def _load_overlay(self) -> dict:
+        if self._overlay is None:
+            self._overlay = (
+                _read_csv(self.overlay_path)
+                if os.path.exists(self.overlay_path) else {}
+            )
+        return self._overlay
+
+    def lookup(self, cep: str) -> Optional[tuple]:
+        """Retorna (latitude, longitude) do CEP ou None se não indexado"""
+        key = _cep_key(cep)
+        if key is None:
+            return None
+
+        coords = self._search(key) or self._load_overlay().get(key)
+        if coords is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return coords
+
+    def _search(self, key: int) -> Optional[tuple]:
+        if not self._open():
+            return None
+
+        low, high = 0, self._count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            (current,) = KEY.unpack_from(self._mmap, offset)
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle - 1
+            else:
+                _, latitude, longitude = RECORD.unpack_from(self._mmap, offset)
+                return (latitude, longitude)
+        return None
+
+    def as_array(self) -> np.ndarray:
+        """Visão NumPy (somente leitura, sem cópia) de todos os registros"""
+        if not self._open():
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.frombuffer(
+            self._mmap,
+            dtype=RECORD_DTYPE,
+            count=self._count,
+            offset=HEADER.size
+        )
+
+    def add_overlay(self, cep: str, latitude: float, longitude: float):
+        """Grava coordenadas obtidas fora do índice para reaproveitar depois"""
+        key = _cep_key(cep)
+        if key is None:
+            return
+
+        overlay = self._load_overlay()
+        if key in overlay:
+            return
+        overlay[key] = (latitude, longitude)
+
+        try:
+            is_new = not os.path.exists(self.overlay_path)
+            os.makedirs(os.path.dirname(self.overlay_path) or ".", exist_ok=True)
+            with open(self.overlay_path, "a", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                if is_new:
+                    writer.writerow(["cep", "latitude", "longitude"])
+                writer.writerow([f"{key:08d}", latitude, longitude])
+        except OSError as error:
+            print(f"ERROR: funcion {CepIndex.add_overlay.__name__} -> error -> {str(error)}")
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "indexed": self._count if self._open() else 0,
+            "overlay": len(self._load_overlay())
+        }
+
+
+cep_index = CepIndex()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("uso: python -m app.services.geoindex <ceps.csv> [saida.bin]")
+        sys.exit(1)
+
+    total = build_index(*sys.argv[1:3])
+    print(f"{total} CEPs indexados")
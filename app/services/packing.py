@@ -0,0 +1,98 @@
+# services/packing.py
+"""
+    Empacotamento do carrinho em caixas (first-fit decreasing).
+
+    Os itens são ordenados do maior para o menor volume e cada um vai
+    para a primeira caixa aberta com volume e peso livres em que ele
+    caiba (medidas ordenadas). No fim, cada caixa é trocada pelo menor
+    modelo que comporta o seu conteúdo. É uma heurística por volume,
+    sem arranjo 3D exato, suficiente para cotar o frete.
+
+    Modelos de caixa configuráveis em SHIPPING_BOXES:
+        "P:20x15x10:10;M:30x20x15:20"  (nome:CxAxL em cm:peso máximo em kg)
+"""
+from typing import List
+from decouple import config
+from app.schemas import ShippingCalculateRequest
+from app.services.quotes import Parcel
+
+
+DEFAULT_BOXES = "P:20x15x10:10;M:30x20x15:20;G:40x30x25:30;GG:60x40x40:30"
+
+
+def parse_boxes(spec: str) -> List[tuple]:
+    """Retorna [(nome, (medidas ordenadas), volume, peso máximo)] do menor ao maior"""
+    boxes = []
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        name, dimensions, max_weight = entry.split(":")
+        sizes = tuple(sorted((float(size) for size in dimensions.lower().split("x")), reverse=True))
+        boxes.append((name, sizes, sizes[0] * sizes[1] * sizes[2], float(max_weight)))
+    return sorted(boxes, key=lambda box: box[2])
+
+
+SHIPPING_BOXES = parse_boxes(config("SHIPPING_BOXES", default=DEFAULT_BOXES))
+
+
+def _fits(item_sizes: tuple, box_sizes: tuple) -> bool:
+    return all(item <= box for item, box in zip(item_sizes, box_sizes))
+
+
+class _Bin:
+    __slots__ = ("volume", "weight", "sizes")
+
+    def __init__(self):
+        self.volume = 0.0
+        self.weight = 0.0
+        self.sizes = (0.0, 0.0, 0.0)  # maiores medidas entre os itens
+
+    def add(self, sizes: tuple, volume: float, weight: float):
+        self.volume += volume
+        self.weight += weight
+        self.sizes = tuple(max(a, b) for a, b in zip(self.sizes, sizes))
+
+
+def pack_items(items: list, boxes: List[tuple] = SHIPPING_BOXES) -> List[Parcel]:
+    """Empacota os itens (ShippingItem) e retorna um Parcel por caixa"""
+    largest = boxes[-1]
+    units = []
+    for item in items:
+        sizes = tuple(sorted((item.length, item.height, item.width), reverse=True))
+        units.extend(
+            [(sizes[0] * sizes[1] * sizes[2], sizes, item.weight)] * item.quantity
+        )
+    units.sort(key=lambda unit: unit[0], reverse=True)
+
+    bins: List[_Bin] = []
+    parcels: List[Parcel] = []
+    for volume, sizes, weight in units:
+        if not _fits(sizes, largest[1]) or weight > largest[3]:
+            # Não cabe em nenhuma caixa: segue na embalagem própria
+            parcels.append(Parcel(weight, *sizes))
+            continue
+
+        target = next((
+            current for current in bins
+            if current.volume + volume <= largest[2]
+            and current.weight + weight <= largest[3]
+        ), None)
+        if target is None:
+            target = _Bin()
+            bins.append(target)
+        target.add(sizes, volume, weight)
+
+    for current in bins:
+        _, box_sizes, _, _ = next(
+            box for box in boxes
+            if box[2] >= current.volume
+            and box[3] >= current.weight
+            and _fits(current.sizes, box[1])
+        )
+        parcels.append(Parcel(current.weight, *box_sizes))
+    return parcels
+
+
+def request_parcels(request: ShippingCalculateRequest) -> List[Parcel]:
+    """Caixas a cotar: carrinho empacotado ou o pacote único informado"""
+    if request.items:
+        return pack_items(request.items)
+    return [Parcel(request.weight, request.length, request.height, request.width)]
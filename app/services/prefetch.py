@@ -0,0 +1,141 @@
+# services/prefetch.py
+import asyncio
+import heapq
+import math
+import time
+from typing import List
+from decouple import config
+from app.schemas import ShippingCalculateRequest
+from app.services.quotes import Parcel
+from app.utils import current_tenant, BACKGROUND_TENANT, RateLimitedError
+
+
+QUOTE_PREFETCH_INTERVAL = config("QUOTE_PREFETCH_INTERVAL", default=60, cast=float)
+QUOTE_PREFETCH_TOP_N = config("QUOTE_PREFETCH_TOP_N", default=100, cast=int)
+# Recota o que vence antes de QUOTE_PREFETCH_MARGIN segundos
+QUOTE_PREFETCH_MARGIN = config("QUOTE_PREFETCH_MARGIN", default=60 * 15, cast=float)
+QUOTE_DEMAND_HALF_LIFE = config("QUOTE_DEMAND_HALF_LIFE", default=60 * 60, cast=float)
+QUOTE_DEMAND_MAX_ENTRIES = config("QUOTE_DEMAND_MAX_ENTRIES", default=5000, cast=int)
+
+
+class QuoteDemand:
+    """
+        Registra a procura por cotações por loja e região (prefixo de 5
+        dígitos dos CEPs + caixas do carrinho), com decaimento exponencial,
+        e mantém as N mais procuradas sempre em cache: um loop em segundo
+        plano recota no Correios o que está perto de vencer.
+    """
+
+    def __init__(
+        self,
+        top_n: int = QUOTE_PREFETCH_TOP_N,
+        interval: float = QUOTE_PREFETCH_INTERVAL,
+        margin: float = QUOTE_PREFETCH_MARGIN,
+        half_life: float = QUOTE_DEMAND_HALF_LIFE,
+        max_entries: int = QUOTE_DEMAND_MAX_ENTRIES
+    ):
+        self.top_n = top_n
+        self.interval = interval
+        self.margin = margin
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self._entries: dict = {}  # chave -> [score, atualizado em, request, caixas]
+        self.runs = 0
+        self.checked = 0
+        self.deferred = 0
+        self.last_run_ms = 0.0
+
+    def _score(self, entry: list, now: float) -> float:
+        return entry[0] * math.pow(0.5, (now - entry[1]) / self.half_life)
+
+    def record(self, request: ShippingCalculateRequest, parcels: List[Parcel]):
+        key = (
+            str(request.store_id or ""),
+            request.origin_cep[:5],
+            request.destination_cep[:5],
+            tuple(sorted(parcel.key() for parcel in parcels))
+        )
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[key] = [1.0, now, request, parcels]
+            return
+
+        entry[0] = self._score(entry, now) + 1.0
+        entry[1] = now
+        entry[2], entry[3] = request, parcels
+
+    def _evict(self, now: float):
+        # Descarta o décimo menos procurado
+        drop = max(1, len(self._entries) // 10)
+        for key in heapq.nsmallest(
+            drop,
+            self._entries,
+            key=lambda key: self._score(self._entries[key], now)
+        ):
+            del self._entries[key]
+
+    def hot(self, n: int = None) -> list:
+        """As N regiões mais procuradas: [(score, request, caixas)]"""
+        now = time.monotonic()
+        return [
+            (self._score(entry, now), entry[2], entry[3])
+            for entry in heapq.nlargest(
+                n or self.top_n,
+                self._entries.values(),
+                key=lambda entry: self._score(entry, now)
+            )
+        ]
+
+    async def refresh(self) -> int:
+        """
+            Recota as regiões mais procuradas que estão perto de vencer.
+            RETURN:
+                Quantidade de regiões verificadas.
+        """
+        from app.services.shipping import ShippingCalculator
+
+        started = time.perf_counter()
+        checked = 0
+        for _, request, parcels in self.hot():
+            calculator = ShippingCalculator()
+            try:
+                await calculator._calculate_correios(
+                    request,
+                    parcels,
+                    refresh_before=self.margin
+                )
+            except RateLimitedError:
+                # Cota ocupada pelo tráfego das lojas: tenta na próxima rodada
+                self.deferred += 1
+                break
+            checked += 1
+
+        self.runs += 1
+        self.checked += checked
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+        return checked
+
+    async def run(self):
+        current_tenant.set(BACKGROUND_TENANT)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as error:
+                print(f"ERROR: funcion {QuoteDemand.run.__name__} -> error -> {str(error)}")
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._entries),
+            "top_n": self.top_n,
+            "runs": self.runs,
+            "checked": self.checked,
+            "deferred": self.deferred,
+            "last_run_ms": round(self.last_run_ms, 2)
+        }
+
+
+quote_demand = QuoteDemand()
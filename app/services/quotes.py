@@ -0,0 +1,94 @@
+# services/quotes.py
+import json
+import math
+from typing import List, Optional
+from decouple import config
+from app.core.snapshot import cache_snapshot
+from app.schemas import ShippingOptionResponse
+from app.utils import TTLCache
+
+
+CORREIOS_QUOTE_CACHE_SIZE = config("CORREIOS_QUOTE_CACHE_SIZE", default=20000, cast=int)
+CORREIOS_QUOTE_CACHE_TTL = config("CORREIOS_QUOTE_CACHE_TTL", default=60 * 60 * 6, cast=int)
+
+# Faixas de peso (kg) da tabela dos Correios; acima de 1kg, de kg em kg
+WEIGHT_BANDS = (0.3, 0.5, 1.0)
+DIMENSION_STEP = 5  # cm
+
+
+def weight_band(weight: float) -> float:
+    for band in WEIGHT_BANDS:
+        if weight <= band:
+            return band
+    return float(math.ceil(weight))
+
+
+def dimension_band(size: float) -> int:
+    return max(DIMENSION_STEP, math.ceil(size / DIMENSION_STEP) * DIMENSION_STEP)
+
+
+class Parcel:
+    """
+        Volume já arredondado para as faixas de preço da transportadora.
+        É o que vai para a API: assim a cotação em cache vale para
+        qualquer pacote da mesma faixa.
+    """
+
+    __slots__ = ("weight", "length", "height", "width")
+
+    def __init__(self, weight: float, length: float, height: float, width: float):
+        self.weight = weight_band(weight)
+        self.length = dimension_band(length)
+        self.height = dimension_band(height)
+        self.width = dimension_band(width)
+
+    def key(self) -> tuple:
+        return (self.weight, self.length, self.height, self.width)
+
+
+class CorreiosQuoteCache:
+    """
+        Cache de cotações dos Correios (TTL + LRU), compartilhado entre
+        requisições. A chave usa o prefixo de 5 dígitos dos CEPs de origem
+        e destino, o código do serviço e o pacote arredondado em faixas.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = CORREIOS_QUOTE_CACHE_SIZE,
+        ttl: int = CORREIOS_QUOTE_CACHE_TTL
+    ):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key(origin_cep: str, destination_cep: str, service: str, parcel: Parcel) -> tuple:
+        return (origin_cep[:5], destination_cep[:5], service, *parcel.key())
+
+    def get(self, key: tuple) -> Optional[List[ShippingOptionResponse]]:
+        return self.cache.get(key)
+
+    def get_stale(self, key: tuple) -> Optional[List[ShippingOptionResponse]]:
+        """Última cotação conhecida, marcada como `stale`"""
+        options = self.cache.get_stale(key)
+        if options is None:
+            return None
+        return [option.model_copy(update={"stale": True}) for option in options]
+
+    def expires_in(self, key: tuple) -> float:
+        return self.cache.expires_in(key)
+
+    def set(self, key: tuple, options: List[ShippingOptionResponse]):
+        self.cache.set(key, options)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+correios_quotes = CorreiosQuoteCache()
+cache_snapshot.register(
+    "correios",
+    correios_quotes.cache,
+    dump=lambda options: json.dumps([option.model_dump() for option in options]).encode(),
+    load=lambda raw: [ShippingOptionResponse(**option) for option in json.loads(raw)],
+    load_key=tuple
+)
@@ -0,0 +1,278 @@
+# services/rules.py
+import asyncio
+import time
+from bisect import bisect_right
+from typing import List
+from decouple import config
+from sqlalchemy import Text, cast, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.future import select
+from app.db.session import AsyncSessionLocal
+from app.models import ShippingRuleModel
+from app.utils import CompiledFormula, FormulaError, TTLCache
+
+
+SHIPPING_RULES_REFRESH_INTERVAL = config("SHIPPING_RULES_REFRESH_INTERVAL", default=30, cast=float)
+
+compiled_formulas = TTLCache(maxsize=4096, ttl=60 * 60 * 24)
+
+
+def get_rule_formula(rule: ShippingRuleModel) -> CompiledFormula:
+    """Retorna a fórmula compilada da regra, compilando só na primeira vez"""
+    key = (rule.id, rule.version, rule.formula)
+    formula = compiled_formulas.get(key)
+    if formula is None:
+        formula = CompiledFormula(rule.formula)
+        compiled_formulas.set(key, formula)
+    return formula
+
+
+# Faixas de CEP (5 primeiros dígitos) por UF, para entradas como "SP*"
+UF_CEP_RANGES = {
+    "SP": [(1000, 19999)],
+    "RJ": [(20000, 28999)],
+    "ES": [(29000, 29999)],
+    "MG": [(30000, 39999)],
+    "BA": [(40000, 48999)],
+    "SE": [(49000, 49999)],
+    "PE": [(50000, 56999)],
+    "AL": [(57000, 57999)],
+    "PB": [(58000, 58999)],
+    "RN": [(59000, 59999)],
+    "CE": [(60000, 63999)],
+    "PI": [(64000, 64999)],
+    "MA": [(65000, 65999)],
+    "PA": [(66000, 68899)],
+    "AP": [(68900, 68999)],
+    "AM": [(69000, 69299), (69400, 69899)],
+    "RR": [(69300, 69399)],
+    "AC": [(69900, 69999)],
+    "DF": [(70000, 72799), (73000, 73699)],
+    "GO": [(72800, 72999), (73700, 76799)],
+    "RO": [(76800, 76999)],
+    "TO": [(77000, 77999)],
+    "MT": [(78000, 78899)],
+    "MS": [(79000, 79999)],
+    "PR": [(80000, 87999)],
+    "SC": [(88000, 89999)],
+    "RS": [(90000, 99999)]
+}
+
+
+def _cep_prefix(value: str, pad: str) -> int:
+    digits = "".join(char for char in value if char.isdigit())
+    if not digits:
+        raise ValueError(f"Faixa de CEP inválida: {value}")
+    return int(digits[:5].ljust(5, pad))
+
+
+def parse_cep_range(range_str: str) -> List[tuple]:
+    """
+        Converte uma entrada de `origin_cep_ranges` em intervalos
+        (inicio, fim) sobre os 5 primeiros dígitos do CEP. Formatos:
+            "01000 a 05999" / "01000-000 a 05999-999": faixa;
+            "SP*": todos os CEPs da UF;
+            "01*": todos os CEPs com o prefixo;
+            "01310-100": um único CEP.
+    """
+
+    value = range_str.strip().upper()
+    if value == "*":
+        return [(0, 99999)]
+
+    if value.endswith("*"):
+        prefix = value[:-1].strip()
+        if prefix in UF_CEP_RANGES:
+            return list(UF_CEP_RANGES[prefix])
+        return [(_cep_prefix(prefix, "0"), _cep_prefix(prefix, "9"))]
+
+    if " A " in value:
+        start, end = value.split(" A ", 1)
+        start, end = _cep_prefix(start, "0"), _cep_prefix(end, "9")
+        if start > end:
+            raise ValueError(f"Faixa de CEP invertida: {range_str}")
+        return [(start, end)]
+
+    return [(_cep_prefix(value, "0"), _cep_prefix(value, "9"))]
+
+
+class CepRangeIndex:
+    """
+        Índice de intervalos das faixas de CEP de origem das regras.
+
+        As faixas de todas as regras são quebradas em segmentos disjuntos
+        e ordenados; cada segmento guarda as regras que o cobrem. A
+        consulta é uma busca binária (bisect) pelo segmento do CEP.
+        Regras sem faixas valem para qualquer origem.
+    """
+
+    def __init__(self, rules: tuple):
+        events = []
+        always = []
+        for position, rule in enumerate(rules):
+            if not rule.origin_cep_ranges:
+                always.append(position)
+                continue
+
+            for range_str in rule.origin_cep_ranges:
+                try:
+                    intervals = parse_cep_range(range_str)
+                except ValueError as error:
+                    print(f"Regra {rule.name}: {str(error)}")
+                    continue
+                for start, end in intervals:
+                    events.append((start, 1, position))
+                    events.append((end + 1, -1, position))
+
+        events.sort()
+        self._outside = tuple(rules[position] for position in always)
+        self._starts: List[int] = []
+        self._members: List[tuple] = []
+
+        active: dict = {}
+        index = 0
+        while index < len(events):
+            point = events[index][0]
+            while index < len(events) and events[index][0] == point:
+                _, delta, position = events[index]
+                active[position] = active.get(position, 0) + delta
+                if not active[position]:
+                    del active[position]
+                index += 1
+
+            members = tuple(
+                rules[position]
+                for position in sorted(set(always) | active.keys())
+            )
+            # Segmentos vizinhos com as mesmas regras são fundidos
+            if self._members and self._members[-1] == members:
+                continue
+            self._starts.append(point)
+            self._members.append(members)
+
+    def candidates(self, cep: str) -> tuple:
+        """Regras cuja faixa de origem contém o CEP"""
+        slot = bisect_right(self._starts, _cep_prefix(cep, "0")) - 1
+        if slot < 0:
+            return self._outside
+        return self._members[slot]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+class ShippingRuleRegistry:
+    """
+        Snapshot em memória das regras de frete ativas.
+
+        As regras são carregadas de `tb_shipping_rules` já ordenadas e com
+        a fórmula validada/compilada. O snapshot é recarregado quando:
+            - `invalidate()` é chamado (alteração feita neste processo);
+            - a impressão digital da tabela (quantidade de regras e soma das
+              versões) muda, verificada no máximo a cada
+              SHIPPING_RULES_REFRESH_INTERVAL segundos (alteração feita por
+              outro worker).
+    """
+
+    def __init__(self, refresh_interval: float = SHIPPING_RULES_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.rules: tuple = ()
+        self.index = CepRangeIndex(())
+        self.version = None
+        self.reloads = 0
+        self._dirty = True
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._dirty = True
+
+    async def get_rules(self) -> tuple:
+        if self._dirty or time.monotonic() - self._checked_at > self.refresh_interval:
+            async with self._lock:
+                await self._refresh()
+        return self.rules
+
+    async def candidates(self, origin_cep: str) -> tuple:
+        """Regras ativas aplicáveis ao CEP de origem"""
+        await self.get_rules()
+        return self.index.candidates(origin_cep)
+
+    async def _refresh(self):
+        if not self._dirty and time.monotonic() - self._checked_at <= self.refresh_interval:
+            return  # outra corrotina já atualizou enquanto esperávamos o lock
+
+        try:
+            async with AsyncSessionLocal() as session:
+                version = await self._fingerprint(session)
+                if self._dirty or version != self.version:
+                    await self._load(session)
+                    self.version = version
+            self._dirty = False
+        except Exception as error:
+            # Mantém o último snapshot válido se o banco falhar
+            print(f"ERROR: funcion {ShippingRuleRegistry._refresh.__name__} -> error -> {str(error)}")
+        finally:
+            self._checked_at = time.monotonic()
+
+    async def _fingerprint(self, session) -> tuple:
+        """
+            (quantidade, md5 do conteúdo) das regras. Vem das próprias
+            colunas, então edições direto no banco (sem passar por
+            ShippingRuleModel.update, sem mudar `version`) também
+            disparam o recarregamento.
+        """
+        row = func.concat_ws(
+            "|",
+            ShippingRuleModel.id,
+            ShippingRuleModel.version,
+            ShippingRuleModel.name,
+            ShippingRuleModel.service_code,
+            ShippingRuleModel.max_weight,
+            ShippingRuleModel.min_dimension,
+            ShippingRuleModel.max_dimension,
+            ShippingRuleModel.formula,
+            ShippingRuleModel.is_active,
+            cast(ShippingRuleModel.origin_cep_ranges, Text)
+        )
+        result = await session.execute(
+            select(
+                func.count(ShippingRuleModel.id),
+                func.md5(func.coalesce(
+                    func.string_agg(row, aggregate_order_by(";", ShippingRuleModel.id)),
+                    ""
+                ))
+            )
+        )
+        return tuple(result.one())
+
+    async def _load(self, session):
+        result = await session.execute(
+            select(ShippingRuleModel)
+            .where(ShippingRuleModel.is_active.is_(True))
+            .order_by(ShippingRuleModel.name, ShippingRuleModel.id)
+        )
+
+        rules = []
+        for rule in result.scalars().all():
+            try:
+                get_rule_formula(rule)
+            except FormulaError as error:
+                print(f"Regra {rule.name} ignorada: {str(error)}")
+                continue
+            rules.append(rule)
+
+        self.rules = tuple(rules)
+        self.index = CepRangeIndex(self.rules)
+        self.reloads += 1
+
+    def stats(self) -> dict:
+        return {
+            "rules": len(self.rules),
+            "cep_segments": len(self.index),
+            "version": list(self.version) if self.version else None,
+            "reloads": self.reloads
+        }
+
+
+shipping_rules = ShippingRuleRegistry()
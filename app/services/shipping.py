@@ -1,19 +1,45 @@
 # services/shipping.py
-import httpx
+import asyncio
+import time
 from uuid import UUID
 from typing import List
+import numpy as np
+from decouple import config
 from geopy.distance import geodesic
-from geopy.geocoders import Nominatim
-from geopy.adapters import AioHTTPAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.core.config import Settings
+from app.core.http import http_clients
 from app.schemas import (
     ShippingCalculateRequest, 
     ShippingOptionResponse,
     LocalDeliveryResponse
 )
 from app.models import StoreModel, ShippingRuleModel
+from app.services.cep import cep_resolver
+from app.services.quotes import Parcel, correios_quotes
+from app.services.packing import request_parcels
+from app.services.prefetch import quote_demand
+from app.services.rules import shipping_rules, get_rule_formula
+from app.utils import (
+    LatencyRecorder,
+    FormulaError,
+    RateLimitedError,
+    current_tenant
+)
+
+
+SHIPPING_QUOTE_DEADLINE = config("SHIPPING_QUOTE_DEADLINE", default=4.0, cast=float)
+FREE_RADIUS_KM = 5
+# Serviços cotados nos Correios (04014 = SEDEX, 04510 = PAC)
+CORREIOS_SERVICES = [
+    service.strip()
+    for service in config("CORREIOS_SERVICES", default="04014,04510").split(",")
+    if service.strip()
+]
+# Uma chamada com todas as caixas/serviços (contrato de lote não confirmado)
+CORREIOS_BATCH_QUOTES = config("CORREIOS_BATCH_QUOTES", default=False, cast=bool)
+
+provider_timings = LatencyRecorder()
 
 
 class LocalDeliveryCalculator:
@@ -27,7 +53,7 @@ class LocalDeliveryCalculator:
         destination_cep: str
     ) -> LocalDeliveryResponse:
         # Verificar se é mesma cidade
-        if not await self._is_same_city(store.cep, destination_cep):
+        if not await self._is_same_city(store, destination_cep):
             return LocalDeliveryResponse(
                 is_local=False,
                 delivery_fee=0,
@@ -37,40 +63,43 @@ class LocalDeliveryCalculator:
         # Calcular distância
         distance = await self._calculate_distance(
             destination_cep,
-            store.cep
+            store
         )
         print(f'DESTINATION CEP::: {destination_cep}')
         print(f'STORE CEP::: {store.cep}')
         print(f'STORE FIXED TAX::: {store.delivery_fee}')
         print(f'DISTANCE::: {distance}')
 
-        # Calcular taxa
-        fee = store.delivery_fee or self.base_fee
-        if distance > 5:  # Taxa adicional após 5km
-            fee += (distance - 5) * self.km_rate
-
         return LocalDeliveryResponse(
             is_local=True,
-            delivery_fee=round(fee, 2),
+            delivery_fee=round(self._fee(distance, store.delivery_fee), 2),
             estimated_time=self._estimate_time(distance),
             distance_km=round(distance, 2)
         )
 
-    async def _is_same_city(self, cep1: str, cep2: str) -> bool:
-        """Consulta API de CEP para verificar cidade"""
-        async with httpx.AsyncClient() as client:
-            res1 = await client.get(f"https://viacep.com.br/ws/{cep1}/json/")
-            res2 = await client.get(f"https://viacep.com.br/ws/{cep2}/json/")
-            
-            data1 = res1.json()
-            data2 = res2.json()
-            
-            return data1.get("localidade") == data2.get("localidade")
-
-    async def _calculate_distance(self, destination_cep: str, origin_cep: str) -> float:
-        """Calcula a distância em km entre a origem e o destino"""
+    async def _is_same_city(self, store: StoreModel, destination_cep: str) -> bool:
+        """
+            Compara a cidade da loja (já salva) com a cidade do CEP de destino.
+            Provedor fora do ar (ProviderUnavailableError) sobe para quem
+            chamou: sem resposta não dá para afirmar que não é local.
+        """
         try:
-            origin_coords = await self._get_coordinates(origin_cep)     
+            destination = await cep_resolver.get_address(destination_cep)
+            city = store.city or (
+                await cep_resolver.get_address(store.cep)
+            ).get("localidade")
+        except ValueError:
+            return False
+
+        return destination.get("localidade") == city
+
+    async def _calculate_distance(self, destination_cep: str, store: StoreModel) -> float:
+        """Calcula a distância em km entre a loja e o destino (provedor fora do ar sobe)"""
+        try:
+            if store.latitude is not None and store.longitude is not None:
+                origin_coords = (store.latitude, store.longitude)
+            else:
+                origin_coords = await self._get_coordinates(store.cep)
             dest_coords = await self._get_coordinates(destination_cep)
 
             return geodesic(origin_coords, dest_coords).km
@@ -79,43 +108,15 @@ class LocalDeliveryCalculator:
             return 0.0  # Retorno seguro para erros
 
     async def _get_coordinates(self, cep: str) -> tuple:
-        """Obtém lat/long do CEP usando geocodificação"""
-        try:
-            # Primeiro obtemos o endereço completo
-            async with httpx.AsyncClient() as client:
-                viacep_response = await client.get(
-                    f"https://viacep.com.br/ws/{cep}/json/"
-                )
-                viacep_response.raise_for_status()
-                address_data = viacep_response.json()
-
-                if "erro" in address_data:
-                    raise ValueError("CEP não encontrado")
-
-            # Monta o endereço para geocodificação
-            address = (
-                f"{address_data.get('logradouro', '')}, "
-                f"{address_data.get('bairro', '')}, "
-                f"{address_data.get('localidade', '')}, "
-                f"{address_data.get('uf', '')}"
-            )
+        """Obtém lat/long do CEP usando o cache de CEPs"""
+        return await cep_resolver.get_coordinates(cep)
 
-            # Usa Nominatim para obter coordenadas
-            async with Nominatim(
-                user_agent="luhub-app",  # Substitua com seu user-agent
-                adapter_factory=AioHTTPAdapter
-            ) as geolocator:
-                location = await geolocator.geocode(address)
-                
-                if not location:
-                    raise ValueError("Endereço não encontrado")
-                    
-                return (location.latitude, location.longitude)
-
-        except httpx.HTTPError as e:
-            raise ValueError(f"Erro na API: {str(e)}")
-        except KeyError as e:
-            raise ValueError(f"Dados de resposta inválidos: {str(e)}")
+    def _fee(self, distance: float, delivery_fee: float) -> float:
+        """Taxa fixa da loja (ou base) mais o adicional por km"""
+        fee = delivery_fee or self.base_fee
+        if distance > FREE_RADIUS_KM:  # Taxa adicional após 5km
+            fee += (distance - FREE_RADIUS_KM) * self.km_rate
+        return fee
 
     def _estimate_time(self, distance: float) -> str:
         """Estima tempo de entrega com base na distância"""
@@ -126,11 +127,34 @@ class LocalDeliveryCalculator:
         else:
             return f"{int(distance * 10)}-{int(distance * 12)} minutos"
 
+    def fees(self, distances: np.ndarray, delivery_fees: np.ndarray) -> np.ndarray:
+        """Versão vetorizada de `_fee` para várias lojas de uma vez"""
+        fees = np.where(delivery_fees > 0, delivery_fees, self.base_fee)
+        return fees + np.maximum(distances - FREE_RADIUS_KM, 0) * self.km_rate
+
+    def estimate_times(self, distances: np.ndarray) -> List[str]:
+        """Versão vetorizada de `_estimate_time`"""
+        lower = (distances * 10).astype(int)
+        upper = (distances * 12).astype(int)
+        return [
+            "15-30 minutos" if distance <= 2 else
+            "30-45 minutos" if distance <= 5 else
+            f"{low}-{high} minutos"
+            for distance, low, high in zip(distances.tolist(), lower.tolist(), upper.tolist())
+        ]
+
 
 class ShippingCalculator:
     def __init__(self):
-        self.correios_url = "https://api.correios.com.br/preco/v1"
-        self.cache = {}  # Implementar Redis em produção
+        # Prazo fixo da configuração: o construtor é injetado com Depends(),
+        # e qualquer argumento viraria parâmetro de query da rota
+        self.deadline = SHIPPING_QUOTE_DEADLINE
+        self._deadline_at = None
+        self.timings = {}
+        self.partial = []
+        # Provedores que responderam incompletos (falha, circuito aberto,
+        # serviço sem cotação): a resposta não deve ir para o cache
+        self.degraded = []
 
     async def _get_store(self, store_id: UUID, session) -> StoreModel:
         result = await session.execute(
@@ -140,7 +164,7 @@ class ShippingCalculator:
         store = result.scalar_one_or_none()
         
         if not store:
-            raise "Loja não encontrada"
+            raise ValueError("Loja não encontrada")
         
         return store
 
@@ -149,124 +173,472 @@ class ShippingCalculator:
         request: ShippingCalculateRequest,
         session
     ) -> List[ShippingOptionResponse]:
-        options = []
-        
-        # 1. Calcular frete dos Correios
-        correios_options = await self._calculate_correios(request)
-        options.extend(correios_options)
-        
-        # 2. Calcular regras customizadas
-        custom_options = await self._calculate_custom(request)
-        options.extend(custom_options)
+        return (await self.calculate_batch([request], session))[0]
 
-        local_service = await LocalDeliveryCalculator().calculate(
-            store=await self._get_store(request.store_id, session),
-            destination_cep=request.destination_cep
+    async def calculate_batch(
+        self,
+        requests: List[ShippingCalculateRequest],
+        session
+    ) -> List[List[ShippingOptionResponse]]:
+        """
+            Calcula as opções de frete de várias requisições da mesma loja.
+            Loja, regras e CEPs são resolvidos uma vez, e as chamadas
+            externas distintas rodam em paralelo.
+        """
+
+        if requests and requests[0].store_id is not None:
+            # Fila justa da cota dos provedores é por loja
+            current_tenant.set(str(requests[0].store_id))
+        self._deadline_at = time.monotonic() + self.deadline
+
+        # Os provedores rodam em paralelo dentro de um único prazo;
+        # quem não responder a tempo fica de fora e a resposta é parcial
+        results = await self._run_providers({
+            "correios": self._calculate_correios_batch(requests),
+            "custom": self._calculate_custom_batch(requests),
+            "local": self._calculate_local_batch(requests, session)
+        })
+
+        empty = [[] for _ in requests]
+        correios = results.get("correios", empty)
+        custom = results.get("custom", empty)
+        local = results.get("local", empty)
+
+        quotes = []
+        for index in range(len(requests)):
+            if local[index]:
+                quotes.append(local[index])
+                continue
+            options = correios[index] + custom[index]
+            quotes.append(sorted(options, key=lambda x: x.cost))
+        return quotes
+
+    async def _run_providers(self, providers: dict) -> dict:
+        tasks = {
+            name: asyncio.create_task(self._timed(name, coro))
+            for name, coro in providers.items()
+        }
+        done, pending = await asyncio.wait(
+            tasks.values(),
+            timeout=self.deadline
         )
-        
-        if local_service.is_local:
-            return [local_service]
-        
-        return sorted(options, key=lambda x: x.cost)
+
+        for task in pending:
+            task.cancel()
+
+        results = {}
+        for name, task in tasks.items():
+            if task in pending:
+                self.partial.append(name)
+                self.timings[name] = self.deadline * 1000
+                provider_timings.observe(name, self.deadline * 1000, "timeout")
+                continue
+
+            error = task.exception()
+            if isinstance(error, RateLimitedError):
+                # Cota esgotada sem cotação de reserva: vira 429 com Retry-After
+                raise error
+            if error is not None:
+                # Provedor com erro fica de fora, como no estouro do prazo
+                print(f"ERROR: funcion {ShippingCalculator._run_providers.__name__} -> provider {name} -> error -> {str(error)}")
+                self.partial.append(name)
+                continue
+            results[name] = task.result()
+
+        return results
+
+    async def _timed(self, name: str, coro):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            # Estourou o prazo: o tempo já foi registrado em _run_providers
+            outcome = None
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            if outcome is not None:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.timings[name] = elapsed_ms
+                provider_timings.observe(name, elapsed_ms, outcome)
+
+    async def _calculate_local_batch(
+        self,
+        requests: List[ShippingCalculateRequest],
+        session
+    ) -> List[List[ShippingOptionResponse]]:
+        store_id = requests[0].store_id if requests else None
+        if store_id is None:
+            return [[] for _ in requests]
+
+        store = await self._get_store(store_id, session)
+        calculator = LocalDeliveryCalculator()
+        destinations = list(dict.fromkeys(
+            request.destination_cep for request in requests
+        ))
+        services = await asyncio.gather(*[
+            calculator.calculate(store=store, destination_cep=destination)
+            for destination in destinations
+        ])
+
+        options = {}
+        for destination, local_service in zip(destinations, services):
+            options[destination] = [
+                ShippingOptionResponse(
+                    carrier="Loja",
+                    service="Entrega local",
+                    cost=local_service.delivery_fee,
+                    delivery_time=0,
+                    description=local_service.estimated_time
+                )
+            ] if local_service.is_local else []
+
+        return [options[request.destination_cep] for request in requests]
+
+    def _degrade(self, name: str):
+        if name not in self.degraded:
+            self.degraded.append(name)
+
+    def _remaining(self) -> float:
+        if self._deadline_at is None:
+            return self.deadline
+        return max(0.0, self._deadline_at - time.monotonic())
+
+    def server_timing(self) -> str:
+        """Monta o header Server-Timing com a duração de cada provedor"""
+        return ", ".join(
+            f"{name};dur={elapsed_ms:.1f}"
+            for name, elapsed_ms in self.timings.items()
+        )
+
+    async def _calculate_correios_batch(
+        self,
+        requests: List[ShippingCalculateRequest]
+    ) -> List[List[ShippingOptionResponse]]:
+        # Carrinhos com as mesmas caixas para a mesma faixa de CEP viram uma só cotação
+        unique = {}
+        keys = []
+        for request in requests:
+            parcels = request_parcels(request)
+            key = (
+                request.origin_cep[:5],
+                request.destination_cep[:5],
+                tuple(sorted(parcel.key() for parcel in parcels))
+            )
+            unique.setdefault(key, (request, parcels))
+            keys.append(key)
+
+        for request, parcels in unique.values():
+            quote_demand.record(request, parcels)
+
+        quotes = dict(zip(unique, await asyncio.gather(*[
+            self._calculate_correios(request, parcels)
+            for request, parcels in unique.values()
+        ])))
+        return [quotes[key] for key in keys]
 
     async def _calculate_correios(
         self, 
-        request: ShippingCalculateRequest
+        request: ShippingCalculateRequest,
+        parcels: List[Parcel] = None,
+        refresh_before: float = 0
     ) -> List[ShippingOptionResponse]:
+        """
+            Cota todos os serviços habilitados para todas as caixas do
+            carrinho. Cotações por caixa/serviço ficam em cache; só as que
+            faltam vão para a API, numa única chamada.
+            `refresh_before` recota também as que vencem em menos de N
+            segundos (usado pelo pré-cálculo em segundo plano).
+        """
+        parcels = parcels or request_parcels(request)
+        boxes = {parcel.key(): parcel for parcel in parcels}
+        quotes = {}
+        missing = {}
+        for service in CORREIOS_SERVICES:
+            for box_key, parcel in boxes.items():
+                cache_key = correios_quotes.key(
+                    request.origin_cep,
+                    request.destination_cep,
+                    service,
+                    parcel
+                )
+                cached = correios_quotes.get(cache_key)
+                if cached is not None and (
+                    not refresh_before or correios_quotes.expires_in(cache_key) > refresh_before
+                ):
+                    quotes[(service, box_key)] = cached[0]
+                else:
+                    missing[(service, box_key)] = cache_key
+
+        if missing:
+            quotes.update(await self._fetch_correios(request, boxes, missing))
+
+        return self._merge_services(parcels, quotes)
+
+    async def _fetch_correios(
+        self,
+        request: ShippingCalculateRequest,
+        boxes: dict,
+        missing: dict
+    ) -> dict:
+        """
+            Cota as caixas/serviços de `missing`.
+
+            Contrato documentado do /calcular: um objeto (peso/dimensoes
+            no topo) e um serviço por chamada, e a resposta não diz a que
+            serviço/caixa cada item se refere. Por isso, por padrão, vai
+            uma chamada por (serviço, caixa), em paralelo.
+
+            Com CORREIOS_BATCH_QUOTES (contrato ainda não confirmado), vai
+            tudo numa chamada só:
+                requisição: cepOrigem, cepDestino, servicos[] e
+                    objetos[{id, peso, dimensoes}] (o id é o índice da caixa);
+                resposta: servicos[{codigo, objeto, nome, valor, prazo,
+                    descricao}], onde `objeto` é o id da caixa.
+        """
+        if CORREIOS_BATCH_QUOTES:
+            groups = [missing]
+        else:
+            groups = [{quote_key: cache_key} for quote_key, cache_key in missing.items()]
+
+        results = await asyncio.gather(*[
+            self._fetch_correios_group(request, boxes, group)
+            for group in groups
+        ], return_exceptions=True)
+
+        found = {}
+        limited = None
+        for result in results:
+            if isinstance(result, RateLimitedError):
+                limited = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                found.update(result)
+
+        if limited is not None:
+            # Cota esgotada além do prazo: serve o que veio ou 429
+            if not found:
+                raise limited
+            self._degrade("correios")
+        return found
+
+    async def _fetch_correios_group(
+        self,
+        request: ShippingCalculateRequest,
+        boxes: dict,
+        missing: dict
+    ) -> dict:
+        """Uma chamada ao /calcular para as caixas/serviços de `missing`"""
+        def stale() -> dict:
+            found = {}
+            for quote_key, cache_key in missing.items():
+                options = correios_quotes.get_stale(cache_key)
+                if options:
+                    found[quote_key] = options[0]
+            return found
+
+        # Cota esgotada além do prazo: última cotação conhecida ou 429
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.correios_url}/calcular",
-                    json={
-                        "cepOrigem": request.origin_cep,
-                        "cepDestino": request.destination_cep,
-                        "peso": request.weight,
-                        "dimensoes": {
-                            "comprimento": request.length,
-                            "altura": request.height,
-                            "largura": request.width
-                        },
-                        "servicos": ["04014"]
-                    },
-                    headers={
-                        "Authorization": f"Bearer {Settings.CORREIOS_API_KEY}"
-                    }
+            await http_clients.limiter("correios").acquire(budget=self._remaining())
+        except RateLimitedError:
+            found = stale()
+            if found:
+                self._degrade("correios")
+                return found
+            raise
+
+        # Circuito aberto: falha na hora e serve a última cotação conhecida
+        breaker = http_clients.breaker("correios")
+        if not breaker.allow():
+            self._degrade("correios")
+            return stale()
+
+        box_keys = list(dict.fromkeys(box_key for _, box_key in missing))
+        services = list(dict.fromkeys(service for service, _ in missing))
+        objects = [
+            {
+                "id": index,
+                "peso": boxes[box_key].weight,
+                "dimensoes": {
+                    "comprimento": boxes[box_key].length,
+                    "altura": boxes[box_key].height,
+                    "largura": boxes[box_key].width
+                }
+            }
+            for index, box_key in enumerate(box_keys)
+        ]
+        payload = {
+            "cepOrigem": request.origin_cep,
+            "cepDestino": request.destination_cep,
+            "servicos": services
+        }
+        if len(objects) == 1:
+            payload.update(peso=objects[0]["peso"], dimensoes=objects[0]["dimensoes"])
+        else:
+            payload["objetos"] = objects
+
+        try:
+            response = await http_clients.get("correios").post(
+                "/calcular",
+                json=payload
+            )
+            response.raise_for_status()
+
+            items = response.json()["servicos"]
+            found = {}
+            for item in items:
+                quote_key = self._correios_quote_key(item, services, box_keys)
+                if quote_key not in missing:
+                    continue
+                found[quote_key] = ShippingOptionResponse(
+                    carrier="Correios",
+                    service=item["nome"],
+                    cost=float(item["valor"]),
+                    delivery_time=item["prazo"],
+                    description=item["descricao"]
                 )
-                response.raise_for_status()
-                
-                return [
-                    ShippingOptionResponse(
-                        carrier="Correios",
-                        service=item["nome"],
-                        cost=float(item["valor"]),
-                        delivery_time=item["prazo"],
-                        description=item["descricao"]
-                    )
-                    for item in response.json()["servicos"]
-                ]
-                
+                correios_quotes.set(missing[quote_key], [found[quote_key]])
+        except asyncio.CancelledError:
+            # Estourou o prazo da cotação: conta como falha do provedor
+            breaker.record_failure()
+            raise
         except Exception as e:
-            # Logar erro e retornar lista vazia
-            return []
+            print(f"Erro na cotação dos Correios: {str(e)}")
+            breaker.record_failure()
+            self._degrade("correios")
+            return stale()
+
+        if items and not found:
+            # Respondeu, mas nada pôde ser atribuído: contrato diferente do esperado
+            print("Erro na cotação dos Correios: resposta sem serviço/caixa reconhecível")
+            breaker.record_failure()
+            self._degrade("correios")
+            return stale()
+
+        breaker.record_success()
+        if len(found) < len(missing):
+            # Algum serviço/caixa sem cotação: fica de fora desta resposta
+            self._degrade("correios")
+        return found
+
+    @staticmethod
+    def _correios_quote_key(item: dict, services: list, box_keys: list):
+        """(serviço, caixa) do item da resposta; None se não der para atribuir"""
+        service = item.get("codigo")
+        if service is None:
+            if len(services) != 1:
+                return None
+            service = services[0]
+
+        index = item.get("objeto")
+        if index is None:
+            if len(box_keys) != 1:
+                return None
+            index = 0
+        try:
+            return (str(service), box_keys[int(index)])
+        except (IndexError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _merge_services(parcels: List[Parcel], quotes: dict) -> List[ShippingOptionResponse]:
+        """Soma as caixas por serviço; serviço sem cotação para alguma caixa fica de fora"""
+        options = []
+        for service in CORREIOS_SERVICES:
+            parts = [quotes.get((service, parcel.key())) for parcel in parcels]
+            if not parts or None in parts:
+                continue
+            first = parts[0]
+            options.append(ShippingOptionResponse(
+                carrier=first.carrier,
+                service=first.service,
+                cost=round(sum(part.cost for part in parts), 2),
+                delivery_time=max(part.delivery_time for part in parts),
+                description=(
+                    first.description if len(parts) == 1
+                    else f"{first.description} ({len(parts)} volumes)"
+                ),
+                stale=any(part.stale for part in parts)
+            ))
+        return options
 
     async def _calculate_custom(
         self, 
         request: ShippingCalculateRequest
     ) -> List[ShippingOptionResponse]:
-        # Consultar regras ativas do banco de dados
-        rules = await self._get_active_rules()
-        
-        options = []
-        for rule in rules:
-            if self._validate_rule(rule, request):
-                cost = eval(rule.formula, {
-                    "peso": request.weight,
-                    "volume": request.length * request.height * request.width
-                })
-                options.append(ShippingOptionResponse(
-                    carrier="Custom",
-                    service=rule.name,
-                    cost=round(cost, 2),
-                    delivery_time=3,  # Exemplo fixo
-                    description=f"Regra: {rule.formula}"
-                ))
-        
+        return (await self._calculate_custom_batch([request]))[0]
+
+    async def _calculate_custom_batch(
+        self,
+        requests: List[ShippingCalculateRequest]
+    ) -> List[List[ShippingOptionResponse]]:
+        options = [[] for _ in requests]
+
+        by_origin = {}
+        for index, request in enumerate(requests):
+            by_origin.setdefault(request.origin_cep, []).append(index)
+
+        for origin_cep, indexes in by_origin.items():
+            # Só as regras cuja faixa de origem contém o CEP
+            rules = await shipping_rules.candidates(origin_cep)
+
+            for rule in rules:
+                matching = [
+                    index for index in indexes
+                    if self._validate_rule(rule, requests[index])
+                ]
+                if not matching:
+                    continue
+
+                for index, cost in zip(matching, self._evaluate_rule(rule, [
+                    requests[index] for index in matching
+                ])):
+                    if cost is None:
+                        continue
+                    options[index].append(ShippingOptionResponse(
+                        carrier="Custom",
+                        service=rule.name,
+                        cost=round(cost, 2),
+                        delivery_time=3,  # Exemplo fixo
+                        description=f"Regra: {rule.formula}"
+                    ))
+
         return options
 
-    async def _get_active_rules(self):
-        # Implementar consulta ao banco de dados
-        return [
-            ShippingRuleModel(
-                name="Frete Fixo SP",
-                formula="50",
-                max_weight=10,
-                min_dimension=0,
-                max_dimension=100
-            )
+    def _evaluate_rule(self, rule, requests: List[ShippingCalculateRequest]) -> list:
+        formula = get_rule_formula(rule)
+        values = [
+            (request.weight, request.length * request.height * request.width)
+            for request in requests
         ]
-    
-    def _cep_matches_ranges(self, cep: str, ranges: list):
-        if not ranges:
-            return True
-            
-        cep_num = int(cep[:5])  # Primeiros 5 dígitos
-        for range_str in ranges:
-            if '-' in range_str:
-                start, end = map(int, range_str.replace('-', '').split(' a '))
-                if start <= cep_num <= end:
-                    return True
-            elif '*' in range_str:  # Ex: "SP*"
-                state = cep[:2]
-                return range_str.startswith(state)
-        return False
+        try:
+            return formula.evaluate_many(values)
+        except FormulaError:
+            pass
+
+        # Algum item falhou: avalia um a um para descartar só os inválidos
+        costs = []
+        for peso, volume in values:
+            try:
+                costs.append(formula.evaluate(peso, volume))
+            except FormulaError as e:
+                print(f"Regra {rule.name} ignorada: {str(e)}")
+                costs.append(None)
+        return costs
+
+    async def _get_active_rules(self):
+        # Snapshot em memória, recarregado só quando as regras mudam
+        return await shipping_rules.get_rules()
 
     def _validate_rule(self, rule, request):
-        origin_valid = self._cep_matches_ranges(
-            request.origin_cep, 
-            rule.origin_cep_ranges
+        # A faixa de CEP de origem já foi filtrada pelo índice de regras
+        dimensions = [request.length, request.height, request.width]
+        return (
+            (rule.max_weight is None or request.weight <= rule.max_weight) and
+            (rule.min_dimension is None or min(dimensions) >= rule.min_dimension) and
+            (rule.max_dimension is None or max(dimensions) <= rule.max_dimension)
         )
-        return origin_valid and (
-            request.weight <= rule.max_weight and
-            min([request.length, request.height, request.width]) >= rule.min_dimension and
-            max([request.length, request.height, request.width]) <= rule.max_dimension
-        )
\ No newline at end of file
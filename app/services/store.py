@@ -0,0 +1,114 @@
+# services/store.py
+import asyncio
+from uuid import UUID
+from sqlalchemy import update
+from sqlalchemy.future import select
+from app.db.session import AsyncSessionLocal
+from app.models import StoreModel
+from app.services.cep import cep_resolver
+from app.utils import current_tenant, BACKGROUND_TENANT
+
+
+_relocations: dict = {}
+
+
+async def _resolve_location(cep: str) -> dict:
+    address = await cep_resolver.get_address(cep)
+    latitude, longitude = await cep_resolver.get_coordinates(cep)
+    return {
+        "city": address.get("localidade"),
+        "latitude": latitude,
+        "longitude": longitude
+    }
+
+
+async def locate_store(store: StoreModel) -> bool:
+    """Preenche cidade e coordenadas da loja a partir do CEP"""
+    try:
+        location = await _resolve_location(store.cep)
+    except Exception as error:
+        print(f"ERROR: funcion {locate_store.__name__} -> store {store.id} -> error -> {str(error)}")
+        return False
+
+    store.city = location["city"]
+    store.latitude = location["latitude"]
+    store.longitude = location["longitude"]
+    return True
+
+
+async def relocate_store(store_id: UUID, cep: str) -> bool:
+    """
+        Preenche cidade e coordenadas de uma loja que trocou de CEP.
+        Só grava se a loja ainda estiver com o mesmo CEP (outra troca
+        ou rollback no meio do caminho descarta o resultado).
+    """
+
+    from app.services.delivery_zones import delivery_zones
+    from app.services.store_locator import store_locator
+
+    current_tenant.set(BACKGROUND_TENANT)
+    try:
+        location = await _resolve_location(cep)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(StoreModel)
+                .where(StoreModel.id == store_id, StoreModel.cep == cep)
+                .values(**location)
+            )
+            await session.commit()
+    except Exception as error:
+        print(f"ERROR: funcion {relocate_store.__name__} -> store {store_id} -> error -> {str(error)}")
+        return False
+
+    if not result.rowcount:
+        return False
+    store_locator.invalidate()
+    delivery_zones.schedule(store_id)
+    return True
+
+
+def schedule_relocation(store_id: UUID, cep: str):
+    """Agenda `relocate_store` (uma execução por loja/CEP)"""
+    key = (store_id, cep)
+    if key in _relocations:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(relocate_store(store_id, cep))
+    except RuntimeError:
+        # Fora do event loop (scripts/migrações): fica para o backfill do startup
+        return
+    _relocations[key] = task
+    task.add_done_callback(lambda _: _relocations.pop(key, None))
+
+
+async def backfill_store_locations() -> int:
+    """
+        Geocodifica as lojas que ainda não têm cidade/coordenadas
+        (lojas antigas ou que mudaram de CEP). Roda em segundo plano
+        no startup, uma loja por vez para respeitar o Nominatim.
+        RETURN:
+            Quantidade de lojas atualizadas.
+    """
+
+    from app.services.delivery_zones import delivery_zones
+
+    current_tenant.set(BACKGROUND_TENANT)
+    updated = 0
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(StoreModel)
+                .where(StoreModel.latitude.is_(None))
+            )
+            for store in result.scalars().all():
+                if await locate_store(store):
+                    await session.commit()
+                    delivery_zones.schedule(store.id)
+                    updated += 1
+    except Exception as error:
+        print(f"ERROR: funcion {backfill_store_locations.__name__} -> error -> {str(error)}")
+
+    if updated:
+        from app.services.store_locator import store_locator
+        store_locator.invalidate()
+    return updated
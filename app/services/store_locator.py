@@ -0,0 +1,157 @@
+# services/store_locator.py
+import asyncio
+import math
+import time
+from typing import List
+import numpy as np
+from decouple import config
+from sqlalchemy.future import select
+from app.db.session import AsyncSessionLocal
+from app.models import StoreModel
+from app.schemas import StoreDeliveryOption
+from app.services.cep import cep_resolver
+from app.services.shipping import LocalDeliveryCalculator
+
+
+MAX_LOCAL_DISTANCE_KM = config("MAX_LOCAL_DISTANCE_KM", default=50, cast=float)
+STORE_LOCATOR_REFRESH_INTERVAL = config("STORE_LOCATOR_REFRESH_INTERVAL", default=60, cast=float)
+EARTH_RADIUS_KM = 6371.0088
+# Célula da grade (graus) maior que o raio máximo, basta olhar as 3x3 vizinhas.
+# 90 km/grau cobre a longitude até ~35°S (sul do Brasil)
+GRID_CELL_DEGREES = max(0.1, MAX_LOCAL_DISTANCE_KM / 90.0)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distância (km) de um ponto para vários pontos, em radianos"""
+    dlat = lats - lat
+    dlon = lons - lon
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class StoreLocator:
+    """
+        Responde "quais lojas entregam no meu CEP" a partir de um
+        snapshot em memória das coordenadas das lojas (arrays NumPy).
+
+        Uma grade de células pré-filtra as lojas próximas; a distância
+        (haversine), a taxa e o prazo são calculados de forma vetorizada
+        com as mesmas regras do LocalDeliveryCalculator.
+    """
+
+    def __init__(self, refresh_interval: float = STORE_LOCATOR_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.calculator = LocalDeliveryCalculator()
+        self._loaded_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._set_arrays([])
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _set_arrays(self, rows: list):
+        self.ids = [row.id for row in rows]
+        self.names = [row.name for row in rows]
+        self.cities = np.array([(row.city or "").lower() for row in rows], dtype=object)
+        self.lats = np.radians(np.array([row.latitude for row in rows], dtype=float))
+        self.lons = np.radians(np.array([row.longitude for row in rows], dtype=float))
+        self.delivery_fees = np.array([row.delivery_fee or 0.0 for row in rows], dtype=float)
+
+        grid = {}
+        for index, row in enumerate(rows):
+            grid.setdefault(self._cell(row.latitude, row.longitude), []).append(index)
+        self.grid = {cell: np.array(indexes) for cell, indexes in grid.items()}
+
+    @staticmethod
+    def _cell(latitude: float, longitude: float) -> tuple:
+        return (
+            math.floor(latitude / GRID_CELL_DEGREES),
+            math.floor(longitude / GRID_CELL_DEGREES)
+        )
+
+    async def _refresh(self):
+        if not self._dirty and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+
+        async with self._lock:
+            if not self._dirty and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(
+                        select(
+                            StoreModel.id,
+                            StoreModel.name,
+                            StoreModel.city,
+                            StoreModel.latitude,
+                            StoreModel.longitude,
+                            StoreModel.delivery_fee
+                        ).where(
+                            StoreModel.latitude.is_not(None),
+                            StoreModel.longitude.is_not(None)
+                        )
+                    )
+                    self._set_arrays(result.all())
+                self._dirty = False
+            except Exception as error:
+                print(f"ERROR: funcion {StoreLocator._refresh.__name__} -> error -> {str(error)}")
+            finally:
+                self._loaded_at = time.monotonic()
+
+    def _candidates(self, latitude: float, longitude: float) -> np.ndarray:
+        row, column = self._cell(latitude, longitude)
+        cells = [
+            self.grid[(row + d_row, column + d_column)]
+            for d_row in (-1, 0, 1)
+            for d_column in (-1, 0, 1)
+            if (row + d_row, column + d_column) in self.grid
+        ]
+        return np.concatenate(cells) if cells else np.array([], dtype=int)
+
+    async def find(self, destination_cep: str) -> List[StoreDeliveryOption]:
+        """Lojas da mesma cidade do CEP, até MAX_LOCAL_DISTANCE_KM, por distância"""
+        await self._refresh()
+
+        address = await cep_resolver.get_address(destination_cep)
+        latitude, longitude = await cep_resolver.get_coordinates(destination_cep)
+
+        candidates = self._candidates(latitude, longitude)
+        if not len(candidates):
+            return []
+
+        city = (address.get("localidade") or "").lower()
+        candidates = candidates[self.cities[candidates] == city]
+
+        distances = haversine_km(
+            math.radians(latitude),
+            math.radians(longitude),
+            self.lats[candidates],
+            self.lons[candidates]
+        )
+        within = distances <= MAX_LOCAL_DISTANCE_KM
+        candidates, distances = candidates[within], distances[within]
+
+        order = np.argsort(distances)
+        candidates, distances = candidates[order], distances[order]
+        fees = self.calculator.fees(distances, self.delivery_fees[candidates])
+        times = self.calculator.estimate_times(distances)
+
+        return [
+            StoreDeliveryOption(
+                store_id=self.ids[index],
+                name=self.names[index],
+                delivery_fee=round(fee, 2),
+                estimated_time=estimated_time,
+                distance_km=round(distance, 2)
+            )
+            for index, fee, estimated_time, distance in zip(
+                candidates.tolist(),
+                fees.tolist(),
+                times,
+                distances.tolist()
+            )
+        ]
+
+
+store_locator = StoreLocator()
@@ -1,4 +1,18 @@
 from .exceptions import (
     InsufficientStockError, 
-    PaymentProcessingError
-)
\ No newline at end of file
+    PaymentProcessingError,
+    ProviderUnavailableError,
+    CircuitOpenError,
+    RateLimitedError
+)
+from .cache import TTLCache
+from .metrics import LatencyRecorder
+from .singleflight import SingleFlight
+from .expression import CompiledFormula, FormulaError
+from .circuit_breaker import CircuitBreaker
+from .rate_limiter import (
+    FairRateLimiter,
+    current_tenant,
+    BACKGROUND_TENANT
+)
+from .bloom import BloomFilter
@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+        Cache LRU em memória com expiração por item.
+        Itens vencidos continuam disponíveis via `get_stale` até serem
+        substituídos ou descartados pelo LRU.
+        Mantém contadores de acertos/falhas para métricas.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            # Mantém o item vencido para `get_stale` até ser substituído/removido
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_with_ttl(self, key: Hashable, default: Any = None) -> tuple:
+        """Retorna (segundos restantes, valor); (0, default) se não houver"""
+        value = self.get(key, self)
+        if value is self:
+            return 0, default
+        return int(self._data[key][0] - time.monotonic()), value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o item mesmo que já tenha vencido (fallback em caso de erro)"""
+        item = self._data.get(key)
+        return default if item is None else item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def expires_in(self, key: Hashable) -> float:
+        """Segundos até o item vencer (0 se ausente), sem contar acerto/falha"""
+        item = self._data.get(key)
+        return 0.0 if item is None else max(0.0, item[0] - time.monotonic())
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def items(self) -> list:
+        """[(chave, segundos restantes, valor)] dos itens ainda válidos"""
+        now = time.monotonic()
+        return [
+            (key, expires_at - now, value)
+            for key, (expires_at, value) in self._data.items()
+            if expires_at > now
+        ]
+
+    def keys(self) -> list:
+        return list(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize
+        }
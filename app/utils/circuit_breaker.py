@@ -0,0 +1,111 @@
+import time
+from collections import deque
+from .exceptions import CircuitOpenError
+
+
+class CircuitBreaker:
+    """
+        Circuit breaker por provedor externo.
+
+        CLOSED: chamadas passam; abre quando a taxa de erro na janela
+                (com um mínimo de chamadas) passa do limite.
+        OPEN: chamadas falham na hora até `open_seconds` passar.
+        HALF_OPEN: libera `half_open_probes` chamadas de teste; sucesso
+                fecha o circuito, falha volta a abrir. Sonda sem
+                resultado depois de `probe_timeout` também volta a abrir.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: float = 30,
+        min_calls: int = 10,
+        error_rate: float = 0.5,
+        open_seconds: float = 15,
+        half_open_probes: int = 1,
+        probe_timeout: float = 30
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.half_opened_at = 0.0
+        self.rejected = 0
+        self._calls: deque = deque()
+        self._probes = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.half_opened_at = time.monotonic()
+            self._probes = 0
+
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                if time.monotonic() - self.half_opened_at >= self.probe_timeout:
+                    # Sonda perdida (cancelada, sem record_*): volta a abrir
+                    self._open()
+                self.rejected += 1
+                return False
+            self._probes += 1
+
+        return True
+
+    def check(self):
+        """Como `allow`, mas levanta CircuitOpenError quando a chamada é barrada"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+
+    def record_success(self):
+        if self.state == self.HALF_OPEN:
+            self._close()
+            return
+        self._record(True)
+
+    def record_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+
+        failures = sum(1 for _, ok in self._calls if not ok)
+        if (
+            len(self._calls) >= self.min_calls and
+            failures / len(self._calls) >= self.error_rate
+        ):
+            self._open()
+
+    def _record(self, ok: bool):
+        now = time.monotonic()
+        self._calls.append((now, ok))
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def _close(self):
+        self.state = self.CLOSED
+        self._calls.clear()
+
+    def stats(self) -> dict:
+        failures = sum(1 for _, ok in self._calls if not ok)
+        return {
+            "state": self.state,
+            "calls_in_window": len(self._calls),
+            "failures_in_window": failures,
+            "rejected": self.rejected
+        }
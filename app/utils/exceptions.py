@@ -8,4 +8,24 @@ class InsufficientStockError(Exception):
 
 
 class PaymentProcessingError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class ProviderUnavailableError(Exception):
+    def __init__(self, provider: str, message: str = None):
+        self.provider = provider
+        super().__init__(message or f"Provedor {provider} indisponível")
+
+
+class CircuitOpenError(ProviderUnavailableError):
+    def __init__(self, provider: str):
+        super().__init__(provider, f"Circuito aberto para o provedor {provider}")
+
+
+class RateLimitedError(ProviderUnavailableError):
+    def __init__(self, provider: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            provider,
+            f"Cota do provedor {provider} esgotada, tente em {retry_after:.1f}s"
+        )
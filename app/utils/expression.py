@@ -0,0 +1,113 @@
+import ast
+import math
+from typing import Iterable, List
+
+
+VARIABLES = ("peso", "volume")
+FUNCTIONS = {
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "round": round,
+    "ceil": math.ceil,
+    "floor": math.floor
+}
+MAX_EXPONENT = 3
+MAX_LENGTH = 255
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub
+)
+
+
+class FormulaError(ValueError):
+    pass
+
+
+class CompiledFormula:
+    """
+        Fórmula de frete validada e compilada uma única vez.
+        Aceita apenas aritmética sobre `peso` e `volume` e as
+        funções de FUNCTIONS.
+    """
+
+    __slots__ = ("source", "_code")
+
+    def __init__(self, source: str):
+        self.source = source
+        self._code = compile(_validate(source), "<formula>", "eval")
+
+    def evaluate(self, peso: float, volume: float) -> float:
+        try:
+            return float(eval(self._code, {"__builtins__": {}, **FUNCTIONS}, {
+                "peso": peso,
+                "volume": volume
+            }))
+        except (ArithmeticError, TypeError, ValueError) as error:
+            raise FormulaError(f"Erro ao avaliar fórmula '{self.source}': {error}")
+
+    def evaluate_many(self, values: Iterable[tuple]) -> List[float]:
+        """Avalia a fórmula para vários pares (peso, volume) de uma vez"""
+        return [self.evaluate(peso, volume) for peso, volume in values]
+
+
+def _validate(source: str) -> ast.Expression:
+    if not source or len(source) > MAX_LENGTH:
+        raise FormulaError("Fórmula vazia ou muito longa")
+
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as error:
+        raise FormulaError(f"Fórmula inválida '{source}': {error.msg}")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(f"Construção não permitida na fórmula: {type(node).__name__}")
+
+        if isinstance(node, ast.Constant) and (
+            isinstance(node.value, bool) or
+            not isinstance(node.value, (int, float))
+        ):
+            raise FormulaError("Apenas constantes numéricas são permitidas")
+
+        if isinstance(node, ast.Name) and (
+            node.id not in VARIABLES and node.id not in FUNCTIONS
+        ):
+            raise FormulaError(f"Nome desconhecido na fórmula: {node.id}")
+
+        if isinstance(node, ast.Call) and (
+            not isinstance(node.func, ast.Name) or
+            node.func.id not in FUNCTIONS or
+            node.keywords
+        ):
+            raise FormulaError("Apenas chamadas simples às funções permitidas")
+
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) and not (
+            isinstance(node.right, ast.Constant) and
+            abs(node.right.value) <= MAX_EXPONENT
+        ):
+            raise FormulaError(f"Expoente deve ser uma constante de até {MAX_EXPONENT}")
+
+        # Potência de potência ((9**3)**3)**3... cresce sem limite mesmo com expoente pequeno
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) and any(
+            isinstance(inner, ast.BinOp) and isinstance(inner.op, ast.Pow)
+            for inner in ast.walk(node.left)
+        ):
+            raise FormulaError("Potências aninhadas não são permitidas")
+
+    return tree
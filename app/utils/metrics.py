@@ -0,0 +1,39 @@
+from collections import deque
+
+
+class LatencyRecorder:
+    """
+        Acumula latências (em ms) por nome, com janela das
+        últimas amostras para cálculo de percentis.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: dict = {}
+        self._counters: dict = {}
+
+    def observe(self, name: str, elapsed_ms: float, outcome: str = "ok"):
+        samples = self._samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(elapsed_ms)
+        counters = self._counters.setdefault(name, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+    def stats(self) -> dict:
+        result = {}
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[name] = {
+                **self._counters.get(name, {}),
+                "p50_ms": round(self._percentile(ordered, 0.50), 2),
+                "p95_ms": round(self._percentile(ordered, 0.95), 2),
+                "p99_ms": round(self._percentile(ordered, 0.99), 2),
+                "max_ms": round(ordered[-1], 2) if ordered else 0.0
+            }
+        return result
+
+    @staticmethod
+    def _percentile(ordered: list, q: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
@@ -0,0 +1,143 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Optional
+from .exceptions import RateLimitedError
+from .metrics import LatencyRecorder
+
+
+# Loja da requisição atual; as tasks criadas herdam o valor.
+# Jobs em segundo plano usam BACKGROUND_TENANT (peso menor)
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+BACKGROUND_TENANT = "background"
+ANONYMOUS_TENANT = "anonymous"
+
+
+class FairRateLimiter:
+    """
+        Token bucket por provedor externo com fila justa (WFQ) entre lojas.
+
+        O bucket libera `rate` chamadas por segundo, com rajadas de até
+        `burst`. Quando não há token, a chamada entra na fila com uma
+        etiqueta de término virtual por loja (peso maior = fatia maior),
+        então uma loja com muitas chamadas não atrasa as demais.
+
+        Se a espera prevista passar do orçamento da requisição, a chamada
+        é recusada na hora com RateLimitedError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float = 1,
+        max_wait: float = 5.0,
+        weights: Optional[dict] = None
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.weights = {BACKGROUND_TENANT: 0.25, **(weights or {})}
+        self.rejected = 0
+        self.waits = LatencyRecorder()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queue: list = []  # heap (etiqueta, ordem, loja, future)
+        self._order = itertools.count()
+        self._virtual_time = 0.0
+        self._finish: dict = {}
+        self._timer = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def projected_wait(self, tenant: str) -> float:
+        """Espera prevista (s) para uma nova chamada da loja"""
+        self._refill()
+        tag = self._tag(tenant)
+        ahead = sum(1 for item in self._queue if item[0] <= tag and not item[3].done())
+        return max(0.0, (ahead + 1 - self._tokens) / self.rate)
+
+    def _tag(self, tenant: str) -> float:
+        start = max(self._virtual_time, self._finish.get(tenant, 0.0))
+        return start + 1.0 / self.weights.get(tenant, 1.0)
+
+    async def acquire(self, tenant: Optional[str] = None, budget: Optional[float] = None):
+        """Aguarda um token; `budget` é o tempo máximo de espera aceitável"""
+        tenant = str(tenant or current_tenant.get() or ANONYMOUS_TENANT)
+        budget = self.max_wait if budget is None else min(budget, self.max_wait)
+
+        self._refill()
+        if not self._queue and self._tokens >= 1:
+            self._tokens -= 1
+            self.waits.observe("wait", 0.0)
+            return
+
+        wait = self.projected_wait(tenant)
+        if wait > budget:
+            self.rejected += 1
+            self.waits.observe("wait", 0.0, "rejected")
+            raise RateLimitedError(self.name, wait)
+
+        tag = self._tag(tenant)
+        self._finish[tenant] = tag
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (tag, next(self._order), tenant, future))
+        self._schedule()
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # O token chegou junto com o cancelamento: devolve ao bucket
+                self._tokens = min(self.burst, self._tokens + 1)
+                self._schedule()
+            raise
+        self.waits.observe("wait", (time.monotonic() - started) * 1000, "queued")
+
+    def _schedule(self):
+        if self._timer is not None or not self._queue:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            tag, _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._tokens -= 1
+            self._virtual_time = tag
+            future.set_result(None)
+
+        while self._queue and self._queue[0][3].done():
+            heapq.heappop(self._queue)
+        if not self._queue:
+            # Fila vazia: todas as etiquetas já passaram do tempo virtual
+            self._finish.clear()
+        self._schedule()
+
+    def stats(self) -> dict:
+        self._refill()
+        depth = {}
+        for _, _, tenant, future in self._queue:
+            if not future.done():
+                depth[tenant] = depth.get(tenant, 0) + 1
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "queue_depth": sum(depth.values()),
+            "queue_by_tenant": depth,
+            "rejected": self.rejected,
+            "wait": self.waits.stats().get("wait", {})
+        }
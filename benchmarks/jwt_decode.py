@@ -0,0 +1,39 @@
+"""
+    Custo por requisição para validar o bearer token: jwt.decode com
+    config() a cada chamada (como era) x decode_access_token com o
+    cache de claims verificados.
+
+        python -m benchmarks.jwt_decode [iterações]
+"""
+import sys
+import time
+from datetime import timedelta
+from decouple import config
+from jose import jwt
+from app.core.security import create_access_token, decode_access_token
+
+
+def measure(func, token: str, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(token)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def decode_uncached(token: str) -> dict:
+    return jwt.decode(token, config("SECRET_KEY"), algorithms=[config("ALGORITHM")])
+
+
+def main(iterations: int):
+    token = create_access_token({"sub": "bench@luhub.com.br"}, timedelta(minutes=30))
+    decode_access_token(token)  # primeira requisição: verifica e guarda
+
+    uncached = measure(decode_uncached, token, iterations)
+    cached = measure(decode_access_token, token, iterations)
+    print(f"jwt.decode + config(): {uncached:.1f} µs/requisição")
+    print(f"decode_access_token:   {cached:.1f} µs/requisição")
+    print(f"economia:              {uncached - cached:.1f} µs ({uncached / cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
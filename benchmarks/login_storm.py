@@ -0,0 +1,76 @@
+"""
+    Latência de uma rota comum (sem autenticação) durante uma rajada de
+    logins, com o bcrypt no event loop (como era) e no PasswordHasher.
+
+        python -m benchmarks.login_storm [logins] [duração em s]
+
+    A "rota comum" é simulada por uma tarefa que acorda a cada 5 ms;
+    o atraso em relação ao horário esperado é a latência que qualquer
+    requisição do worker sofreria naquele instante.
+"""
+import asyncio
+import sys
+import time
+from passlib.context import CryptContext
+from app.core.hashing import PasswordHasher
+
+
+TICK = 0.005
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def probe(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        samples.append((time.perf_counter() - expected) * 1000)
+
+
+async def storm(verify, hashed: str, logins: int, duration: float) -> dict:
+    samples = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, samples))
+
+    interval = duration / logins
+    started = time.perf_counter()
+    tasks = []
+    for _ in range(logins):
+        tasks.append(asyncio.create_task(verify("senha-correta", hashed)))
+        await asyncio.sleep(interval)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    return {
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+        "max_ms": round(max(samples), 2),
+        "logins_per_s": round(logins / elapsed, 1)
+    }
+
+
+async def main(logins: int, duration: float):
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    hashed = context.hash("senha-correta")
+
+    async def inline_verify(plain: str, hashed_password: str) -> bool:
+        return context.verify(plain, hashed_password)
+
+    print("bcrypt no event loop:", await storm(inline_verify, hashed, logins, duration))
+    for kind in ("thread", "process"):
+        hasher = PasswordHasher(kind=kind)
+        print(f"PasswordHasher ({kind}):", await storm(hasher.verify, hashed, logins, duration))
+        print("  fila/execução:", hasher.stats())
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 40,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    ))
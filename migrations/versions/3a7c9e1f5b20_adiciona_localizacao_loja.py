@@ -0,0 +1,32 @@
+"""Adiciona cidade e coordenadas da loja
+
+Revision ID: 3a7c9e1f5b20
+Revises: 22d773ff724f
+Create Date: 2026-10-18 10:12:41.203118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7c9e1f5b20'
+down_revision: Union[str, None] = '22d773ff724f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tb_store', sa.Column('city', sa.String(length=100), nullable=True))
+    op.add_column('tb_store', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('tb_store', sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tb_store', 'longitude')
+    op.drop_column('tb_store', 'latitude')
+    op.drop_column('tb_store', 'city')
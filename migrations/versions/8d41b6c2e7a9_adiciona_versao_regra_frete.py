@@ -0,0 +1,31 @@
+"""Adiciona versão da regra de frete
+
+Revision ID: 8d41b6c2e7a9
+Revises: 3a7c9e1f5b20
+Create Date: 2026-10-18 11:02:17.554081
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41b6c2e7a9'
+down_revision: Union[str, None] = '3a7c9e1f5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tb_shipping_rules',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tb_shipping_rules', 'version')
@@ -0,0 +1,28 @@
+import time
+import pytest
+from app.utils.expression import CompiledFormula, FormulaError
+
+
+def test_formula_evaluates_allowed_arithmetic():
+    formula = CompiledFormula("max(10, peso * 2.5 + volume / 1000) + peso ** 2")
+    assert formula.evaluate(2, 3000) == 14.0
+
+
+@pytest.mark.parametrize("source", [
+    "peso ** 4",
+    "peso ** volume",
+    "9 ** 3 ** 3",
+    "((((((((((((((9**3)**3)**3)**3)**3)**3)**3)**3)**3)**3)**3)**3)**3)**3)",
+    "max(9 ** 3, 1) ** 3",
+    "__import__('os')",
+])
+def test_formula_rejects_unbounded_or_unsafe_expressions(source):
+    with pytest.raises(FormulaError):
+        CompiledFormula(source)
+
+
+def test_nested_power_is_rejected_before_evaluation():
+    started = time.perf_counter()
+    with pytest.raises(FormulaError):
+        CompiledFormula("(" * 14 + "9**3" + ")**3" * 13 + ")**3")
+    assert time.perf_counter() - started < 0.1